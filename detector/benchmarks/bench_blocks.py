@@ -0,0 +1,89 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""
+bench_blocks.py: time the splitting of traces into blocks against the number
+of call boundaries in them.
+
+Each synthetic trace makes N calls from a single frame, each to a callee that
+stops at once, so it has 2N + 1 blocks. Splitting is linear if the time per
+call stays the same as N grows. As with timeit, the garbage collector is off
+while timing, as its passes over the growing number of live blocks would
+otherwise dominate the larger runs.
+
+Usage: python3 benchmarks/bench_blocks.py [N ...]
+"""
+
+import gc
+import sys
+import time
+from os.path import abspath, dirname, join
+
+# Prepend .. to $PATH so the project modules can be imported below
+src_path = join(dirname(abspath(__file__)), "..")
+sys.path.insert(0, src_path)
+
+import src.evm_efg as evm_efg
+import src.opcodes as opcodes
+
+DEFAULT_CALLS = [1000, 4000, 16000, 64000]
+REPEATS = 5
+
+
+def call_trace(calls: int):
+    """Generate the EVMOps of a trace making the given number of calls."""
+    yield evm_efg.EVMOp(0, opcodes.JUMPDEST)
+    for i in range(calls):
+        pc = 1 + 4 * i
+        yield evm_efg.EVMOp(pc, opcodes.PUSH1, 0)
+        yield evm_efg.EVMOp(pc + 2, opcodes.GAS, 0)
+        # The callee, and the call once it has returned
+        yield evm_efg.EVMOp(0, opcodes.PUSH1, 0)
+        yield evm_efg.EVMOp(2, opcodes.STOP)
+        yield evm_efg.EVMOp(pc + 3, opcodes.CALL, 1, 0)
+
+
+def main(calls: list) -> None:
+    print("{:>8} {:>8} {:>10} {:>12}".format("calls", "blocks", "ms", "us/call"))
+    for n in calls:
+        best = None
+        for _ in range(REPEATS):
+            ops = list(call_trace(n))
+            gc.disable()
+            start = time.perf_counter()
+            blocks = evm_efg.blocks_from_ops(ops)
+            elapsed = time.perf_counter() - start
+            gc.enable()
+            best = elapsed if best is None else min(best, elapsed)
+        print("{:>8} {:>8} {:>10.1f} {:>12.2f}".format(n, len(blocks), best * 1e3,
+                                                       best * 1e6 / n))
+
+
+if __name__ == "__main__":
+    main([int(n) for n in sys.argv[1:]] or DEFAULT_CALLS)
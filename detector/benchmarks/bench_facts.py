@@ -0,0 +1,125 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+bench_facts.py: time the formatting of fact rows and the TSV export.
+
+The rows of the example trace's relations, including the uneven rows of
+op_LOG, are formatted by FactWriter.flush() and, for comparison, by joining
+the fields of each row separately. The whole EFGTsvExporter export of the
+trace is then timed. As with timeit, the garbage collector is off while
+timing.
+
+Usage: python3 benchmarks/bench_facts.py [TRACE]
+"""
+
+import gc
+import io
+import os
+import sys
+import tempfile
+import time
+from os.path import abspath, dirname, join
+
+# Prepend .. to $PATH so the project modules can be imported below
+src_path = join(dirname(abspath(__file__)), "..")
+sys.path.insert(0, src_path)
+
+import src.exporter as exporter
+import src.tac_efg as tac_efg
+
+DEFAULT_TRACE = join(src_path, "..", "example",
+                     "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b.txt")
+OPCODES = ["CALL", "CALLER", "SSTORE", "SLOAD", "JUMPI", "TIMESTAMP", "SELFDESTRUCT",
+           "LOG", "CONST"]
+REPEATS = 10
+
+
+class RowCollector(exporter.EFGTsvExporter):
+    """Keeps the rows of every relation instead of writing them."""
+
+    def __init__(self, efg: tac_efg.TACGraph):
+        super().__init__(efg)
+        self.rows = {}
+
+    def _writer(self, files, relation, arity):
+        writer = exporter.FactWriter(None)
+        writer.flush = lambda: None
+        self.rows[relation] = writer.rows
+        return writer
+
+
+def join_rows(rows: list) -> str:
+    """Format rows one at a time, as the slowest correct writer would."""
+    return "".join(["\t".join(map(str, row)) + "\n" for row in rows])
+
+
+def flush_rows(rows: list) -> str:
+    """Format rows with FactWriter.flush()."""
+    writer = exporter.FactWriter(io.StringIO())
+    writer.rows.extend(rows)
+    writer.flush()
+    return writer.file.getvalue()
+
+
+def best(func, *args) -> float:
+    """Return the best time of func(*args) over REPEATS runs, in seconds."""
+    times = []
+    for _ in range(REPEATS):
+        gc.disable()
+        start = time.perf_counter()
+        func(*args)
+        times.append(time.perf_counter() - start)
+        gc.enable()
+    return min(times)
+
+
+def main(trace: str) -> None:
+    with open(trace) as f:
+        efg = tac_efg.TACGraph.from_opcode(f)
+    collector = RowCollector(efg)
+    with tempfile.TemporaryDirectory() as output_dir:
+        # Only empty files are created
+        collector.export(output_dir, OPCODES)
+    relations = {relation: rows for relation, rows in collector.rows.items() if rows}
+
+    for relation, rows in relations.items():
+        assert flush_rows(rows) == join_rows(rows), relation
+    rows = sum(len(rows) for rows in relations.values())
+    for name, func in [("join per row", join_rows), ("FactWriter.flush", flush_rows)]:
+        elapsed = sum(best(func, rows) for rows in relations.values())
+        print("{:<20} {:>8.1f} ms ({} rows)".format(name, elapsed * 1e3, rows))
+
+    with tempfile.TemporaryDirectory() as output_dir:
+        elapsed = best(lambda: exporter.EFGTsvExporter(efg).export(output_dir, OPCODES))
+        print("{:<20} {:>8.1f} ms ({} files)".format("TSV export", elapsed * 1e3,
+                                                     len(os.listdir(output_dir))))
+
+
+if __name__ == "__main__":
+    main(sys.argv[1] if len(sys.argv) > 1 else DEFAULT_TRACE)
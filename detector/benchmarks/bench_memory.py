@@ -0,0 +1,114 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+bench_memory.py: time the memory operations of apply_operations.
+
+The synthetic trace stores N words with MSTORE and N bytes with MSTORE8 at
+constant offsets. Reading an argument as an int from its const_value is
+compared with the previous round trip through its hex string, a word write
+to PagedMemory is timed, and the time of the whole apply_operations() pass
+over the trace is given per TAC op.
+As with timeit, the garbage collector is off while timing.
+
+Usage: python3 benchmarks/bench_memory.py [N]
+"""
+
+import gc
+import sys
+import time
+import timeit
+from collections import defaultdict
+from os.path import abspath, dirname, join
+
+# Prepend .. to $PATH so the project modules can be imported below
+src_path = join(dirname(abspath(__file__)), "..")
+sys.path.insert(0, src_path)
+
+import src.evm_efg as evm_efg
+import src.memtypes as mem
+import src.opcodes as opcodes
+import src.tac_efg as tac_efg
+
+DEFAULT_STORES = 20000
+REPEATS = 5
+
+
+def memory_trace(stores: int):
+    """Generate the EVMOps of a trace making the given number of each store."""
+    pc = 0
+    for i in range(stores):
+        offset = (i * 32) % 0x10000
+        for opcode, value in [(opcodes.PUSH32, (i + 1) * 0x0101010101010101 << 128),
+                              (opcodes.PUSH2, offset),
+                              (opcodes.MSTORE, None),
+                              (opcodes.PUSH1, i & 0xFF),
+                              (opcodes.PUSH2, offset + 7),
+                              (opcodes.MSTORE8, None)]:
+            yield evm_efg.EVMOp(pc, opcode, value)
+            pc += opcode.op_pc_gap()
+    yield evm_efg.EVMOp(pc, opcodes.STOP)
+
+
+def from_hex(var: mem.Variable) -> int:
+    """Read an argument as the previous apply_operations did."""
+    string = str(var)
+    if string.startswith("0x"):
+        string = string[2:]
+    return int(string, 16)
+
+
+def main(stores: int) -> None:
+    graph = tac_efg.TACGraph.from_ops(memory_trace(stores), trust_values=True)
+    mstore = next(op for op in graph.tac_ops if op.opcode == opcodes.MSTORE)
+    var = mstore.args[1].value
+    namespace = {"from_hex": from_hex, "var": var, "memory": mem.PagedMemory(),
+                 "value": var.const_value}
+    for name, stmt, unit in [("hex round trip", "from_hex(var)", "argument"),
+                             ("const_value", "var.const_value", "argument"),
+                             ("write_int", "memory.write_int(64, 32, value)", "word")]:
+        best = min(timeit.repeat(stmt, globals=namespace, number=100000, repeat=REPEATS))
+        print("{:<20} {:>10.0f} ns/{}".format(name, best * 1e9 / 100000, unit))
+
+    ops = sum(1 for _ in graph.tac_ops)
+    best = None
+    for _ in range(REPEATS):
+        graph.stack_values = defaultdict(dict)
+        graph.frames = mem.CallFrames()
+        gc.disable()
+        start = time.perf_counter()
+        graph.apply_operations()
+        elapsed = time.perf_counter() - start
+        gc.enable()
+        best = elapsed if best is None else min(best, elapsed)
+    print("{:<20} {:>10.0f} ns/op ({} TAC ops, {} pages)".format(
+        "apply_operations", best * 1e9 / ops, ops, len(graph.frames.memory.pages)))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_STORES)
@@ -0,0 +1,91 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""
+bench_stack.py: time DUP and SWAP on a VariableStack, per operation.
+
+The in-place dup() and swap() of VariableStack are compared with the
+previous versions, which popped the top n variables into a list and pushed
+a permuted copy of it back. The stack holds DEPTH variables, so neither
+reaches past its bottom.
+
+Usage: python3 benchmarks/bench_stack.py [N]
+"""
+
+import sys
+import timeit
+from os.path import abspath, dirname, join
+
+# Prepend .. to $PATH so the project modules can be imported below
+src_path = join(dirname(abspath(__file__)), "..")
+sys.path.insert(0, src_path)
+
+import src.memtypes as mem
+
+DEFAULT_NUMBER = 100000
+DEPTH = 30
+REPEATS = 5
+
+
+class PoppingStack(mem.VariableStack):
+    """A VariableStack with the previous, list-building dup() and swap()."""
+
+    def dup(self, n: int) -> None:
+        items = self.pop_many(n)
+        duplicated = [items[-1]] + items
+        self.push_many(reversed(duplicated))
+
+    def swap(self, n: int) -> None:
+        items = self.pop_many(n)
+        swapped = [items[-1]] + items[1:-1] + [items[0]]
+        self.push_many(reversed(swapped))
+
+
+def per_op(stack_type: type, op: str, n: int, number: int) -> float:
+    """Return the best time of one call of stack.op(n), in nanoseconds."""
+    stack = stack_type(mem.Variable.top() for _ in range(DEPTH))
+    if op == "dup":
+        # Pop the copy again, so the stack stays the same depth
+        stmt = "dup({0}); pop()".format(n)
+    else:
+        stmt = "swap({0})".format(n)
+    namespace = {"dup": stack.dup, "swap": stack.swap, "pop": stack.pop}
+    times = timeit.repeat(stmt, globals=namespace, number=number, repeat=REPEATS)
+    return min(times) * 1e9 / number
+
+
+def main(number: int) -> None:
+    print("{:>8} {:>12} {:>12}".format("op", "before ns", "after ns"))
+    for op, n in [("dup", 1), ("dup", 8), ("dup", 16), ("swap", 1), ("swap", 8), ("swap", 16)]:
+        before = per_op(PoppingStack, op, n, number)
+        after = per_op(mem.VariableStack, op, n, number)
+        print("{:>8} {:>12.0f} {:>12.0f}".format("{}{}".format(op.upper(), n), before, after))
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else DEFAULT_NUMBER)
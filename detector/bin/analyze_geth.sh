@@ -29,11 +29,21 @@
 # OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
 # OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
 
-if [ "$#" -ne 2 ]; then
-    echo "Usage: analyze.sh trace_file output_file"
+if [ "$#" -lt 2 ]; then
+    echo "Usage: analyze.sh trace_file output_file [rule_file ...]"
     exit
 fi
-set -x
 DIR="$( cd "$( dirname "${BASH_SOURCE[0]}" )" >/dev/null && pwd )"
+# With rule files, only the relations and opcodes they read are written
+if [ "$#" -gt 2 ]; then
+    RULES=()
+    for RULE in "${@:3}"; do
+        RULES+=(-r "$RULE")
+    done
+    set -x
+    $DIR/decompile_geth "${RULES[@]}" -s -t $2 $1
+    exit
+fi
+set -x
 # Here are the opcdes that we need to detect attacks, you can add or delete them
-$DIR/decompile_geth -o CREATE BALANCE CALLER CALLVALUE STOP RETURN REVERT ORIGIN CALLDATALOAD EQ  TIMESTAMP NUMBER DIFFICULTY COINBASE BLOCKHASH GASLIMIT EXTCODESIZE SELFDESTRUCT JUMPI JUMP JUMPDEST SSTORE SLOAD CALL DELEGATE CALLCODE STATICCALL -n -t $2 $1
+$DIR/decompile_geth -o CREATE BALANCE CALLER CALLVALUE STOP RETURN REVERT ORIGIN CALLDATALOAD EQ  TIMESTAMP NUMBER DIFFICULTY COINBASE BLOCKHASH GASLIMIT EXTCODESIZE SELFDESTRUCT JUMPI JUMP JUMPDEST SSTORE SLOAD CALL DELEGATE CALLCODE STATICCALL -s -t $2 $1
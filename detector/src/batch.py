@@ -0,0 +1,433 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""batch.py: analyze many transaction traces in a single process."""
+
+import concurrent.futures
+import contextlib
+import glob
+import itertools
+import logging
+import os
+import shutil
+import tempfile
+import time
+import typing as t
+from concurrent.futures.process import BrokenProcessPool
+
+import src.evm_efg as evm_efg
+import src.exporter as exporter
+import src.tac_efg as tac_efg
+import src.tracedb as tracedb
+import src.tracefmt as tracefmt
+
+
+def find_traces(source: str) -> t.List[str]:
+    """
+    Return the paths of the trace files described by source.
+
+    Args:
+      source: a directory, whose files are all taken to be traces;
+              a manifest file listing one trace path per line, relative
+              paths being resolved against the manifest's directory;
+              or a glob pattern matching trace files.
+
+    Returns:
+      A list of trace file paths. Directory and glob results are sorted,
+      manifest entries keep their order.
+    """
+    if os.path.isdir(source):
+        return sorted(os.path.join(source, f) for f in os.listdir(source)
+                      if os.path.isfile(os.path.join(source, f)))
+
+    if os.path.isfile(source):
+        base = os.path.dirname(source)
+        with open(source) as manifest:
+            return [os.path.join(base, l.strip()) for l in manifest
+                    if len(l.strip()) > 0 and not l.startswith("#")]
+
+    return sorted(glob.glob(source))
+
+
+def trace_name(path: str) -> str:
+    """
+    Return the name of the transaction whose trace is stored at path,
+    i.e. the file name without its extension.
+    """
+    return os.path.splitext(os.path.basename(path))[0]
+
+
+def check_trace_names(paths: t.Iterable[str]) -> None:
+    """
+    Check that no two of the traces at paths have the same trace_name(), as
+    the facts of both would be written to the same subdirectory.
+
+    Throws:
+      ValueError: naming the first two traces found with the same name.
+    """
+    seen = {}
+    for path in paths:
+        name = trace_name(path)
+        if name in seen:
+            raise ValueError("traces '{}' and '{}' are both named '{}'"
+                             .format(seen[name], path, name))
+        seen[name] = path
+
+
+def analyze_ops(ops: t.Iterable[evm_efg.EVMOp], output_dir: str,
+                out_opcodes: t.List[str] = [], stream: bool = False,
+                trust_values: bool = False, compression: str = None,
+                relations: t.Optional[t.Collection[str]] = None) -> float:
+    """
+    Generate the facts of a single trace.
+
+    Args:
+      ops: the EVMOps of the trace to analyze.
+      output_dir: directory to which the .facts files will be written.
+      out_opcodes: the opcodes whose op_X.facts relations will be written.
+      stream: if True, convert the trace with a TACStream instead of building
+              the whole TACGraph.
+      trust_values: if True, fold constants while converting the trace,
+                    see tac_efg.TACGraph().
+      compression: if not None, write the facts to a single archive compressed
+                   this way instead of the directory output_dir, see
+                   exporter.fact_archive_path().
+      relations: if not None, the relations whose rows to write, such as
+                 rules.RuleSet.read; the others are written empty.
+
+    If the trace cannot be analyzed, nothing is left at output_dir or at
+    the archive path, see _replace_when_done().
+
+    Returns:
+      The wall time spent on the trace, in seconds.
+    """
+    start = time.perf_counter()
+    if stream:
+        efg = tac_efg.TACStream.from_ops(ops, trust_values)
+    else:
+        efg = tac_efg.TACGraph.from_ops(ops, trust_values)
+    if compression is None:
+        with _replace_when_done(output_dir) as partial_dir:
+            exporter.EFGTsvExporter(efg).export(output_dir=partial_dir,
+                                                out_opcodes=out_opcodes,
+                                                relations=relations)
+    else:
+        archive_path = exporter.fact_archive_path(output_dir, compression)
+        with _replace_when_done(archive_path) as partial_path:
+            exporter.EFGArchiveExporter(efg).export(
+                archive_path=partial_path, out_opcodes=out_opcodes,
+                compression=compression, relations=relations)
+    return time.perf_counter() - start
+
+
+@contextlib.contextmanager
+def _replace_when_done(path: str) -> t.Generator[str, None, None]:
+    """
+    Provide a scratch path next to path to write the facts of a trace to,
+    and move them to path once they have all been written.
+
+    A stream-converted trace that fails midway would otherwise leave
+    truncated .facts files that look valid. If writing fails, the scratch
+    path is removed, and so are any facts left at path by an earlier run,
+    so that only the traces that were analyzed have facts.
+    """
+    parent, name = os.path.split(path)
+    partial_path = os.path.join(parent, "." + name + ".partial")
+    _remove(partial_path)
+    try:
+        yield partial_path
+    except BaseException:
+        _remove(partial_path)
+        _remove(path)
+        raise
+    _remove(path)
+    os.replace(partial_path, path)
+
+
+def _remove(path: str) -> None:
+    """Remove the file or directory tree at path, if there is one."""
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path)
+    elif os.path.lexists(path):
+        os.remove(path)
+
+
+def analyze_trace(path: str, output_dir: str, out_opcodes: t.List[str] = [],
+                  stream: bool = False, trust_values: bool = False,
+                  compression: str = None,
+                  relations: t.Optional[t.Collection[str]] = None) -> float:
+    """
+    Generate the facts of the trace stored in the file at path, which may be
+    a text or a binary trace. See analyze_ops().
+    """
+    start = time.perf_counter()
+    with open(path, 'rb') as f:
+        analyze_ops(tracefmt.read_ops(f), output_dir, out_opcodes, stream,
+                    trust_values, compression, relations)
+    return time.perf_counter() - start
+
+
+def analyze_tx_trace(trace: str, output_dir: str, out_opcodes: t.List[str] = [],
+                     stream: bool = False, trust_values: bool = False,
+                     compression: str = None,
+                     relations: t.Optional[t.Collection[str]] = None) -> float:
+    """
+    Generate the facts of a trace in the Tx_Trace format stored in MongoDB.
+    See analyze_ops().
+    """
+    return analyze_ops(evm_efg.ops_from_trace(tracedb.split_trace(trace)),
+                       output_dir, out_opcodes, stream, trust_values, compression,
+                       relations)
+
+
+def _analyze_task(task: t.Tuple[t.Callable, str, str, str, t.List[str], bool, bool, str,
+                                t.Optional[t.Collection[str]]]) \
+    -> t.Tuple[str, t.Optional[float], t.Optional[str]]:
+    """
+    Run a (analyze, name, trace, output_dir, out_opcodes, stream, trust_values,
+    compression, relations) task,
+    catching any error so that it can be reported instead of raised.
+    This is module-level so that it can be sent to worker processes.
+    """
+    analyze, name = task[:2]
+    try:
+        return name, analyze(*task[2:]), None
+    except Exception as e:
+        logging.error("Failed to analyze '%s': %s", name, e)
+        return name, None, "{}: {}".format(type(e).__name__, e)
+
+
+def _run(tasks: t.Iterator[tuple], jobs: int) \
+    -> t.Generator[t.Tuple[str, t.Optional[float], t.Optional[str]], None, None]:
+    """
+    Run the given tasks in this process, or in a pool of jobs workers.
+
+    A worker that dies, for instance when it is killed for running out of
+    memory, breaks the pool, and every task it had been given fails with
+    it. Those tasks are run again one at a time, each in a pool of its own,
+    and the batch goes on in a new pool, so that only a trace that kills
+    its own worker is reported as failed.
+    """
+    if jobs == 1:
+        yield from map(_analyze_task, tasks)
+        return
+
+    # Executor.map would read every task up front, which for traces coming
+    # out of a database means holding all of them in memory. Only a couple
+    # of tasks per worker are submitted ahead instead, and the next one as
+    # soon as any finishes, so that a large trace only holds up its own
+    # worker. Results are small, and are held back until those of all
+    # earlier tasks are in, so that they come out in input order.
+    workers = jobs or os.cpu_count()
+    tasks = enumerate(tasks)
+    running = {}
+    finished = {}
+    next_index = 0
+    pool = concurrent.futures.ProcessPoolExecutor(workers)
+    try:
+        while True:
+            lost = []
+            for index, task in itertools.islice(tasks, 2 * workers - len(running)):
+                future = _submit(pool, task)
+                if future is None:
+                    lost.append((index, task))
+                else:
+                    running[future] = index, task
+            if len(running) == 0 and len(lost) == 0:
+                return
+
+            done, _ = concurrent.futures.wait(
+                running, return_when=concurrent.futures.FIRST_COMPLETED)
+            for future in done:
+                index, task = running.pop(future)
+                result = _result(future)
+                if result is None:
+                    lost.append((index, task))
+                else:
+                    finished[index] = result
+
+            if len(lost) > 0:
+                # The pool is broken, and the tasks still running in it
+                # fail too, unless they were already done
+                for future, (index, task) in running.items():
+                    result = _result(future)
+                    if result is None:
+                        lost.append((index, task))
+                    else:
+                        finished[index] = result
+                running.clear()
+                pool.shutdown()
+                pool = concurrent.futures.ProcessPoolExecutor(workers)
+                for index, task in lost:
+                    finished[index] = _run_alone(task)
+
+            while next_index in finished:
+                yield finished.pop(next_index)
+                next_index += 1
+    finally:
+        pool.shutdown()
+
+
+def _submit(pool: concurrent.futures.Executor, task: tuple) \
+    -> t.Optional[concurrent.futures.Future]:
+    """Submit task to pool, returning None if the pool is broken."""
+    try:
+        return pool.submit(_analyze_task, task)
+    except BrokenProcessPool:
+        return None
+
+
+def _result(future: t.Optional[concurrent.futures.Future]) \
+    -> t.Optional[t.Tuple[str, t.Optional[float], t.Optional[str]]]:
+    """Wait for the result of future, returning None if its worker died."""
+    if future is None:
+        return None
+    try:
+        return future.result()
+    except BrokenProcessPool:
+        return None
+
+
+def _run_alone(task: tuple) -> t.Tuple[str, t.Optional[float], t.Optional[str]]:
+    """
+    Run a task that was lost along with a broken pool in a pool of its own,
+    reporting it as failed if it kills that worker as well.
+    """
+    with concurrent.futures.ProcessPoolExecutor(1) as pool:
+        result = _result(_submit(pool, task))
+    if result is None:
+        name = task[1]
+        logging.error("Failed to analyze '%s': the worker analyzing it died", name)
+        result = name, None, "BrokenProcessPool: the worker analyzing it died"
+    return result
+
+
+def analyze_batch(paths: t.Iterable[str], output_dir: str,
+                  out_opcodes: t.List[str] = [], stream: bool = False,
+                  jobs: int = 1, trust_values: bool = False,
+                  compression: str = None, store: bool = False,
+                  relations: t.Optional[t.Collection[str]] = None) \
+    -> t.Generator[t.Tuple[str, t.Optional[float], t.Optional[str]], None, None]:
+    """
+    Generate the facts of each trace file, writing those of each
+    transaction to its own subdirectory of output_dir.
+
+    A trace that cannot be analyzed is logged and skipped, so one malformed
+    trace does not abort the batch. Traces with the same trace_name() are
+    rejected before any is analyzed, see check_trace_names().
+
+    Args:
+      jobs: the number of worker processes to analyze traces with. If 1, the
+            traces are analyzed in this process; if 0 or None, one worker is
+            started per CPU. The output does not depend on this value.
+      trust_values: if True, fold constants while converting each trace,
+                    see tac_efg.TACGraph().
+      compression: if not None, write the facts of each transaction to a
+                   single archive compressed this way, see analyze_ops().
+      store: if True, append the facts of all transactions to the relations
+             of a single multi-transaction fact store in output_dir instead,
+             see exporter.EFGTxStoreExporter. The transaction id of a trace
+             is the name of its subdirectory.
+      relations: if not None, the relations whose rows to write, see
+                 analyze_ops().
+
+    Returns:
+      A generator of (path, seconds, error) triples, one per trace, in input
+      order. seconds is None and error describes the failure if the trace
+      could not be analyzed.
+
+    Throws:
+      ValueError: if two traces have the same name, once the generator is
+                  first advanced.
+    """
+    paths = list(paths)
+    check_trace_names(paths)
+    facts_root = _facts_root(output_dir, store)
+    tasks = ((analyze_trace, path, path, os.path.join(facts_root, trace_name(path)),
+              out_opcodes, stream, trust_values, compression, relations)
+             for path in paths)
+    results = _run(tasks, jobs)
+    if store:
+        results = _store_results(results, facts_root, output_dir, trace_name)
+    yield from results
+
+
+def analyze_transactions(transactions: t.Iterable[t.Tuple[str, str]], output_dir: str,
+                         out_opcodes: t.List[str] = [], stream: bool = False,
+                         jobs: int = 1, trust_values: bool = False,
+                         compression: str = None, store: bool = False,
+                         relations: t.Optional[t.Collection[str]] = None) \
+    -> t.Generator[t.Tuple[str, t.Optional[float], t.Optional[str]], None, None]:
+    """
+    As analyze_batch(), but for (transaction hash, Tx_Trace) pairs such as
+    those read by tracedb.find_transactions(). The facts of each transaction
+    are written to a subdirectory of output_dir named after its hash.
+    """
+    facts_root = _facts_root(output_dir, store)
+    tasks = ((analyze_tx_trace, tx_hash, trace, os.path.join(facts_root, tx_hash),
+              out_opcodes, stream, trust_values, compression, relations)
+             for tx_hash, trace in transactions)
+    results = _run(tasks, jobs)
+    if store:
+        results = _store_results(results, facts_root, output_dir, lambda tx_hash: tx_hash)
+    yield from results
+
+
+def _facts_root(output_dir: str, store: bool) -> str:
+    """
+    Return the directory under which the facts of each transaction are
+    written: output_dir itself, or a scratch directory in it if they are
+    to be appended to a fact store.
+    """
+    if not store:
+        return output_dir
+    os.makedirs(output_dir, exist_ok=True)
+    return tempfile.mkdtemp(prefix=".facts-", dir=output_dir)
+
+
+def _store_results(results: t.Iterator[t.Tuple[str, t.Optional[float], t.Optional[str]]],
+                   facts_root: str, store_dir: str, tx_id: t.Callable[[str], str]) \
+    -> t.Generator[t.Tuple[str, t.Optional[float], t.Optional[str]], None, None]:
+    """
+    Pass on results, appending the facts of each analyzed transaction from
+    its subdirectory of facts_root to the fact store in store_dir.
+
+    This is done here rather than by the workers so that only one process
+    appends to the store, and transactions are stored in input order.
+    facts_root is removed once all results are through.
+    """
+    try:
+        for name, seconds, error in results:
+            facts_dir = os.path.join(facts_root, tx_id(name))
+            if error is None:
+                exporter.append_facts(facts_dir, store_dir, tx_id(name))
+            shutil.rmtree(facts_dir, ignore_errors=True)
+            yield name, seconds, error
+    finally:
+        shutil.rmtree(facts_root, ignore_errors=True)
@@ -64,39 +64,14 @@ class EVMBasicBlock(cfg.BasicBlock):
         op_seq = "\n".join(str(op) for op in self.evm_ops)
         return "\n".join([super_str, self._STR_SEP, op_seq])
 
-    def split(self, entry: int) -> 'EVMBasicBlock':
-        """
-        Splits current block into a new block, starting at the specified
-        entry op index. Returns a new EVMBasicBlock with no preds or succs.
-
-        Args:
-          entry: unique index of EVMOp from which the block should be split. The
-            EVMOp at this index will become the first EVMOp of the new BasicBlock.
-        """
-        # Create the new block.
-        new = type(self)(entry, self.exit, self.evm_ops[entry - self.entry:])
-
-        # Update the current node.
-        self.exit = entry - 1
-        self.evm_ops = self.evm_ops[:entry - self.entry]
-
-        # Update the block pointer in each line object
-        self.__update_evmop_refs()
-        new.__update_evmop_refs()
-
-        return new
-
-    def __update_evmop_refs(self):
-        # Update references back to parent block for each opcode
-        # This needs to be done when a block is split
-        for op in self.evm_ops:
-            op.block = self
-
 
 class EVMOp:
     """
     Represents a single EVM operation.
     """
+    __slots__ = ("pc", "opcode", "value", "value_extra", "call_depth", "loc",
+                 "call_number", "block")
+
     def __init__(self, pc: int, opcode: opcodes.OpCode, value: int = None, value_extra: int = None,
                  call_depth: int = None, loc: int = None, call_number: int = None):
         """
@@ -126,6 +101,9 @@ class EVMOp:
         # Call number, if you are interested in the details, please refer to our paper
         self.call_number = call_number
 
+        # The EVMBasicBlock containing this op, once it is placed in one
+        self.block = None
+
 
     # The default string of the opcodes
     def __str__(self):
@@ -147,63 +125,153 @@ class EVMOp:
 
 
 # Convert the trace (sequence of opcodes) into basic blocks
-def blocks_from_ops(ops: t.Iterable[EVMOp]) -> t.Iterable[EVMBasicBlock]:
+def annotate_ops(ops: t.Iterable[EVMOp]) -> t.Generator[t.Tuple[EVMOp, bool], None, None]:
     """
-    Process a sequence of EVMOps and create a sequence of EVMBasicBlocks.
+    Assign loc, call_number and call_depth to a sequence of EVMOps in a
+    single forward pass, and find where each EVMBasicBlock starts.
+
+    A new block starts at the first op, whenever a new contract is entered
+    (pc 0), and whenever execution returns to the caller at a CALL* or
+    CREATE*. Any source of EVMOps that feeds TACGraph can use this to
+    annotate its ops; the input may be a generator.
 
     Args:
-      ops: sequence of EVMOps to be put into blocks.
+      ops: sequence of EVMOps, in trace order.
 
     Returns:
-      List of BasicBlocks from the input opcodes.
+      A generator of (op, starts_block) pairs, in trace order, where
+      starts_block is True if op is the first op of a new block.
     """
-    blocks = []
-
-    # details for block currently being processed
-    entry, exit = (0, len(ops) - 1) if len(ops) > 0 \
-        else (None, None)
-    current = EVMBasicBlock(entry, exit)
-
+    prev = None
     call_number = 0
-    for i, op in enumerate(ops):
-        if op.pc == 0 and i != 0:
-            call_number += 1
-        op.call_number = call_number
-
-    # Linear scan of all EVMOps to create initial EVMBasicBlocks
     call_depth = 0
+
     for i, op in enumerate(ops):
-        op.block = current
-        current.evm_ops.append(op)
+        pc = op.pc
+        opcode = op.opcode
+        new_block = False
 
         # Remove all the intra blocks and only focus on the inter edges
         # add a condition to create a new block when encountering the new contract 0;
-        if op.pc == 0 and i == 0:
-            call_depth = 1
-        elif op.pc == 0 and i != 0:
-            call_depth += 1
-            new = current.split(i)
-            blocks.append(current)
-            current = new
+        if pc == 0:
+            if i == 0:
+                call_depth = 1
+            else:
+                call_number += 1
+                call_depth += 1
+                new_block = True
 
         # Add CREATE and CREATE2
-        elif op.opcode.is_kind_four() or op.opcode.is_kind_five():
+        elif opcode.flags & (opcodes.KIND_FOUR | opcodes.KIND_FIVE):
             # Make sure conditions such as 238;ADD 239;CALL will not be split
-            if ops[i-1].call_number == op.call_number \
-                and op.pc - ops[i - 1].pc == ops[i - 1].opcode.op_pc_gap() \
-                and not ops[i-1].opcode.possibly_halts():
-                pass
-            else:
+            if prev is None or prev.call_number != call_number \
+                or pc - prev.pc != prev.opcode.op_pc_gap() \
+                or prev.opcode.possibly_halts():
                 call_depth -= 1
-                new = current.split(i)
-                blocks.append(current)
-                current = new
-
-        # Always add last block if its last instruction does not alter flow
-        elif i == len(ops) - 1:
-            blocks.append(current)
+                new_block = True
 
         op.loc = i
+        op.call_number = call_number
         op.call_depth = call_depth
+        prev = op
+        yield op, new_block or i == 0
+
+
+def blocks_from_ops(ops: t.Iterable[EVMOp]) -> t.List[EVMBasicBlock]:
+    """
+    Process a sequence of EVMOps and create a sequence of EVMBasicBlocks.
+
+    Args:
+      ops: sequence of EVMOps to be put into blocks.
+
+    Returns:
+      List of BasicBlocks from the input opcodes, see iter_blocks().
+    """
+    return list(iter_blocks(ops))
+
+
+# Parse the trace lazily, one opcode per line
+def ops_from_trace(lines: t.Iterable[t.AnyStr]) -> t.Generator[EVMOp, None, None]:
+    """
+    Parse a geth transaction trace into EVMOps, one line at a time.
+
+    Each non-empty line has the form <PC; OPCODE NAME; ARGS>, e.g. 0;PUSH1;96.
+    ARGS is empty, a single decimal value, or two comma-separated decimal
+    values for the call opcodes.
+
+    Lines may also be bytes, as read from a binary file or an mmap, which are
+    tokenized without being decoded. Steps without arguments are the majority
+    of a trace and repeat each time a loop or function body is executed, so
+    their parsed form is cached by line; the cache is bounded by the size of
+    the code executed.
+
+    Args:
+      lines: an iterable of trace lines, such as an open text file.
+
+    Returns:
+      A generator of EVMOps, in trace order.
+    """
+    by_name = {}
+    no_args = {}
+    for l in lines:
+        parsed = no_args.get(l)
+        if parsed is not None:
+            yield EVMOp(parsed[0], parsed[1], None, None)
+            continue
+
+        stripped = l.strip()
+        if len(stripped) == 0:
+            continue
+
+        sep, comma = (b";", b",") if isinstance(stripped, bytes) else (";", ",")
+        args = stripped.split(sep)
+        opcode = by_name.get(args[1])
+        if opcode is None:
+            name = args[1] if isinstance(args[1], str) else args[1].decode()
+            opcode = by_name[args[1]] = opcodes.opcode_by_name(name)
+        if args[2] == stripped[:0]:
+            no_args[l] = int(args[0]), opcode
+            yield EVMOp(int(args[0]), opcode, None, None)
+        elif comma in args[2]:
+            args_extras = args[2].strip().split(comma)
+            yield EVMOp(int(args[0]), opcode, int(args_extras[0]), int(args_extras[1]))
+        elif opcode == opcodes.SELFDESTRUCT:
+            yield EVMOp(int(args[0]), opcode, int(args[2], 0), None)
+        else:
+            yield EVMOp(int(args[0]), opcode, int(args[2]), None)
+
+
+# Each op is placed in its block once, as the trace is read, so this takes
+# time linear in the length of the trace however many blocks it has
+def iter_blocks(ops: t.Iterable[EVMOp]) -> t.Generator[EVMBasicBlock, None, None]:
+    """
+    Process a stream of EVMOps in a single forward pass, yielding each
+    EVMBasicBlock as soon as it is complete.
+
+    Ops are annotated by annotate_ops() as they are read, so the input may be
+    a generator such as the one returned by ops_from_trace(); only the block
+    under construction is held here.
+
+    Args:
+      ops: sequence of EVMOps to be put into blocks.
+
+    Returns:
+      A generator of EVMBasicBlocks, in trace order.
+    """
+    current = None
+    prev = None
+
+    for op, starts_block in annotate_ops(ops):
+        if starts_block:
+            if current is not None:
+                current.exit = op.loc - 1
+                yield current
+            current = EVMBasicBlock(op.loc)
+
+        op.block = current
+        current.evm_ops.append(op)
+        prev = op
 
-    return blocks
+    if current is not None:
+        current.exit = prev.loc
+        yield current
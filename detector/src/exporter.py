@@ -30,9 +30,15 @@
 """exporter.py: abstract classes for exporting decompiler state"""
 
 import abc
-import csv
+import contextlib
+import itertools
 import logging
 import os
+import shutil
+import sqlite3
+import tarfile
+import tempfile
+import typing as t
 
 import src.cfg as efg
 import src.function as function
@@ -60,6 +66,11 @@ class EFGTsvExporter(Exporter, patterns.DynamicVisitor):
     """
     Writes logical relations of the given TAC EFG to local directory.
 
+    Statements and variables are written as numbers rather than symbols:
+    a statement is its pc, and a variable VN is N. Any variable named
+    otherwise gets a negative id, listed with its name in
+    variable_name.facts.
+
     Args:
       efg: the graph to be written to logical relations.
     """
@@ -89,104 +100,542 @@ class EFGTsvExporter(Exporter, patterns.DynamicVisitor):
         """
 
         self.__output_dir = None
+        self.__variable_ids = VariableIds()
 
-    def __generate(self, filename, entries):
-        path = os.path.join(self.__output_dir, filename)
-        with open(path, 'w') as f:
-            writer = csv.writer(f, delimiter='\t', lineterminator='\n')
-            for e in entries:
-                writer.writerow(e)
-
-    def __generate_blocks_ops(self, out_opcodes):
-        # Write a mapping from operation addresses to corresponding opcode names;
-        # a mapping from operation addresses to the block they inhabit;
-        # any specified opcode listings.
-        ops = []
-        # block_nums = []
-        # initialization, empty
-        op_rels = {opcode: list() for opcode in out_opcodes}
+    def _writer(self, files: contextlib.ExitStack, relation: str, arity: int) \
+        -> "FactWriter":
+        """
+        Return the writer for the rows of relation, whose rows have arity
+        fields (None if unknown). Subclasses override this to write the
+        relations somewhere other than .facts files.
+        """
+        path = os.path.join(self.__output_dir, relation + ".facts")
+        return FactWriter(files.enter_context(open(path, 'w')))
+
+    def __generate_block(self, block, ops, op_rels, define, use, value):
+        # ops: mapping from operation addresses to corresponding opcode names
+        # and their position in the trace;
+        # op_rels: any specified opcode listings.
         # Facts pattern: pc + arguments + value name (value is like CALLVALUE's value that will be pushed into stack)
-        for block in self.source.blocks:
-            for op in block.tac_ops:
-                ops.append((hex(op.pc), op.opcode.name, op.loc))
-                if op.opcode.name in out_opcodes:
-                    if op.has_lhs():
-                        output_tuple = tuple([hex(op.pc)] + [arg.value.name for arg in op.args] +
-                                             [op.lhs.name] + [op.loc] + [op.call_depth] + [op.call_number])
-                    else:
-                        output_tuple = tuple([hex(op.pc)] + [arg.value.name for arg in op.args] +
-                                             [op.loc] + [op.call_depth] + [op.call_number])
-                    op_rels[op.opcode.name].append(output_tuple)
-
-        # op.facts contain all the opcodes from the bytecode
-        self.__generate("op.facts", ops)
-
-        # generate all the needed opcode.facts
-        for opcode in op_rels:
-            self.__generate("op_{}.facts".format(opcode), op_rels[opcode])
-
-    def __generate_def_use_value(self):
-        # get the exact values of all the variables
-        # Mapping from variable names to the addresses they were defined at.
-        define = []
-        # Mapping from variable names to the addresses they were used at.
-        use = []
-        # Mapping from variable names to their possible values.
-        value = []
-        for block in self.source.blocks:
-            for op in block.tac_ops:
-                # If it's an assignment op, we have a def site
-                if isinstance(op, tac_efg.TACAssignOp):
-                    define.append((op.lhs.name, hex(op.pc), op.loc, op.call_depth, op.call_number))
-                    # And we can also find its values here.
-                    if op.lhs.values.is_finite:
-                        for val in op.lhs.values:
-                            value.append((op.lhs.name, hex(val)))
-
-                # Special cases for kind one, such as CALLVALUE
-                # if op.opcode != opcodes.CONST:
-                if op.opcode != opcodes.CONST:
-                    # The args constitute use sites.
-                    for i, arg in enumerate(op.args):
-                        name = arg.value.name
-                        use.append((name, hex(op.pc), i + 1, op.loc, op.call_depth, op.call_number))
-
-            # Finally, note where each stack variable might have been defined,
-            # and what values it can take on.
-            # This includes some duplication for stack variables with multiple def
-            # sites. This can be done marginally more efficiently.
-            for var in block.entry_stack:
-                if not var.def_sites.is_const and var.def_sites.is_finite:
-                    name = block.ident() + ":" + var.name
+        # define: mapping from variable names to the addresses they were defined at.
+        # use: mapping from variable names to the addresses they were used at.
+        # value: mapping from variable names to their possible values.
+        # Relations that are not needed are None, and their rows are skipped.
+        ops_rows = None if ops is None else ops.rows
+        define_rows = None if define is None else define.rows
+        use_rows = None if use is None else use.rows
+        value_rows = None if value is None else value.rows
+        assigns = define_rows is not None or value_rows is not None
+        ids = self.__variable_ids
+        op = None
+        for op in block.tac_ops:
+            pc = op.pc
+            name = op.opcode.name
+            loc = op.loc
+            if ops_rows is not None:
+                ops_rows.append((pc, name, loc))
+
+            rel = op_rels.get(name)
+            if rel is not None:
+                fields = [pc]
+                fields.extend(ids[arg.value.name] for arg in op.args)
+                if op.has_lhs():
+                    fields.append(ids[op.lhs.name])
+                fields.extend((loc, op.call_depth, op.call_number))
+                rel.rows.append(fields)
+
+            # If it's an assignment op, we have a def site
+            if assigns and isinstance(op, tac_efg.TACAssignOp):
+                lhs = op.lhs
+                lhs_id = ids[lhs.name]
+                if define_rows is not None:
+                    define_rows.append((lhs_id, pc, loc, op.call_depth, op.call_number))
+                # And we can also find its values here.
+                if value_rows is not None and lhs.is_finite:
+                    for val in lhs:
+                        value_rows.append((lhs_id, hex(val)))
+
+            # Special cases for kind one, such as CALLVALUE
+            if use_rows is not None and op.opcode is not opcodes.CONST:
+                # The args constitute use sites.
+                for i, arg in enumerate(op.args, 1):
+                    use_rows.append((ids[arg.value.name], pc, i, loc, op.call_depth, op.call_number))
+
+        # Finally, note where each stack variable might have been defined,
+        # and what values it can take on.
+        # This includes some duplication for stack variables with multiple def
+        # sites. This can be done marginally more efficiently.
+        for var in block.entry_stack if assigns else ():
+            if not var.def_sites.is_const and var.def_sites.is_finite:
+                var_id = ids[block.ident() + ":" + var.name]
+                if define_rows is not None:
                     for loc in var.def_sites:
-                        define.append((name, hex(loc.pc), op.loc, loc.call_depth, loc.call_number))
+                        define_rows.append((var_id, loc.pc, op.loc, loc.call_depth, loc.call_number))
+
+                if value_rows is not None and var.is_finite:
+                    for val in var:
+                        value_rows.append((var_id, hex(val)))
+
+    def _write_facts(self, files: contextlib.ExitStack, out_opcodes,
+                     relations: t.Optional[t.Collection[str]] = None) -> None:
+        """
+        Write all relations through the writers returned by _writer().
+        If relations is not None, only the rows of the relations it names
+        are generated; the others are written empty.
+        """
+        # All relations are written in a single pass over the blocks, so that
+        # a streamed source such as a TACStream is only traversed once.
+
+        # op.facts contain all the opcodes from the bytecode,
+        # op_X.facts the interested opcodes, such as MSTORE ...
+        ops = self._writer(files, "op", 3)
+        op_rels = {opcode: self._writer(files, "op_" + opcode, op_arity(opcode))
+                   for opcode in out_opcodes}
+
+        # def.facts stores where the V1 V2 ... is defined,
+        # use.facts where the V1 V2 ... used; value.facts what the V1 V2 ... values are
+        define = self._writer(files, "def", 5)
+        use = self._writer(files, "use", 6)
+        value = self._writer(files, "value", 2)
+
+        writers = [ops, define, use, value] + list(op_rels.values())
+
+        # Souffle needs a file for every input relation, so the relations
+        # that are not needed are still created, only without any rows
+        def needed(relation, writer):
+            return writer if relations is None or relation in relations else None
+
+        ops, define, use, value = (needed(relation, writer) for relation, writer in
+                                   (("op", ops), ("def", define), ("use", use), ("value", value)))
+        op_rels = {opcode: writer for opcode, writer in op_rels.items()
+                   if needed("op_" + opcode, writer) is not None}
+
+        for block in self.source.blocks:
+            self.__generate_block(block, ops, op_rels, define, use, value)
+            for writer in writers:
+                if len(writer.rows) >= writer.BUFFER_ROWS:
+                    writer.flush()
 
-                    if var.values.is_finite:
-                        for val in var.values:
-                            value.append((name, hex(val)))
+        # variable_name.facts maps the ids of variables not named VN back to
+        # their names
+        names = self._writer(files, "variable_name", 2)
+        names.rows.extend(self.__variable_ids.names())
+        writers.append(names)
 
-        self.__generate("def.facts", define)
-        self.__generate("use.facts", use)
-        self.__generate("value.facts", value)
+        for writer in writers:
+            writer.flush()
 
-    def export(self, output_dir: str = "", out_opcodes=[]):
+    def export(self, output_dir: str = "", out_opcodes=[], relations=None):
         """
         Args:
           output_dir: location to write the output to.
           out_opcodes: a list of opcode names all occurences thereof to output,
                        with the names of all argument variables.
+          relations: if not None, the names of the relations whose rows to
+                     write, such as rules.RuleSet.read; the files of the
+                     others are left empty.
         """
         if output_dir != "":
             os.makedirs(output_dir, exist_ok=True)
         self.__output_dir = output_dir
 
-        # Generate facts for the interested opcodes, such as MSTORE ...
-        self.__generate_blocks_ops(out_opcodes)
-        
-        # Generate facts for the def.facts (where the V1 V2 ... is defined)
-        # use.fats stores where the V1 V2 ... used; value stores what the V1 V2 ... values are
-        # Previous code
-        self.__generate_def_use_value()
+        with contextlib.ExitStack() as files:
+            self._write_facts(files, out_opcodes, relations)
+
+
+class EFGSqliteExporter(EFGTsvExporter):
+    """
+    Writes the same logical relations as EFGTsvExporter, as the tables of a
+    single SQLite database instead of separate .facts files.
+
+    Each relation is stored in a table of the same name, with its columns in
+    the order of the .facts file, which is what Souffle's sqlite IO reads:
+      .input op(IO=sqlite, dbname="facts.db")
+    Numbers are stored as integers, so they are neither formatted nor parsed
+    as text. read_sqlite_facts() loads the relations back. Rows shorter than
+    their table, such as those of LOG0 in op_LOG, are padded with NULL.
+
+    Args:
+      efg: the graph to be written to logical relations.
+    """
+
+    def __init__(self, efg: tac_efg.TACGraph):
+        super().__init__(efg)
+        self.__db = None
+
+    def _writer(self, files: contextlib.ExitStack, relation: str, arity: int) \
+        -> "SqliteFactWriter":
+        return SqliteFactWriter(self.__db, relation, arity)
+
+    def export(self, db_path: str = "facts.db", out_opcodes=[], relations=None):
+        """
+        Args:
+          db_path: the database file to write, replacing any existing file.
+          out_opcodes: a list of opcode names all occurences thereof to output,
+                       with the names of all argument variables.
+          relations: if not None, the names of the relations whose rows to
+                     write; the tables of the others are left empty.
+        """
+        db_dir = os.path.dirname(db_path)
+        if db_dir != "":
+            os.makedirs(db_dir, exist_ok=True)
+        if os.path.exists(db_path):
+            os.remove(db_path)
+
+        # The database is written from scratch in a single transaction, so
+        # there is nothing to recover if writing it fails halfway
+        with contextlib.closing(sqlite3.connect(db_path)) as db:
+            db.execute("PRAGMA journal_mode = OFF")
+            db.execute("PRAGMA synchronous = OFF")
+            self.__db = db
+            try:
+                with db, contextlib.ExitStack() as files:
+                    self._write_facts(files, out_opcodes, relations)
+            finally:
+                self.__db = None
+
+
+class EFGArchiveExporter(EFGTsvExporter):
+    """
+    Writes the same .facts files as EFGTsvExporter, as the members of a
+    single compressed tar archive instead of a directory.
+
+    extract_facts() unpacks an archive into a directory for Souffle.
+
+    Args:
+      efg: the graph to be written to logical relations.
+    """
+
+    COMPRESSIONS = {"gz": {"compresslevel": 6}, "bz2": {}, "xz": {}}
+    """
+    The supported compressions, as tarfile modes, and the options they are
+    written with. gzip level 6 is about three times as fast as the default
+    level 9 at almost the same ratio; xz is the smallest but the slowest.
+    """
+
+    def export(self, archive_path: str = "facts.tar.gz", out_opcodes=[],
+               compression: str = "gz", relations=None):
+        """
+        Args:
+          archive_path: the archive file to write, replacing any existing file.
+          out_opcodes: a list of opcode names all occurences thereof to output,
+                       with the names of all argument variables.
+          compression: one of COMPRESSIONS.
+          relations: if not None, the names of the relations whose rows to
+                     write; the members of the others are left empty.
+        """
+        options = self.COMPRESSIONS[compression]
+        archive_dir = os.path.dirname(archive_path)
+        if archive_dir != "":
+            os.makedirs(archive_dir, exist_ok=True)
+
+        # The facts are written as usual to a scratch directory, so that the
+        # size of each member is known when it is added to the archive
+        with tempfile.TemporaryDirectory(prefix="facts-") as facts_dir:
+            super().export(facts_dir, out_opcodes, relations)
+            with tarfile.open(archive_path, "w:" + compression, **options) as tar:
+                for filename in sorted(os.listdir(facts_dir)):
+                    tar.add(os.path.join(facts_dir, filename), arcname=filename,
+                            filter=_anonymize)
+
+
+class EFGTxStoreExporter(EFGTsvExporter):
+    """
+    Appends the logical relations of the given TAC EFG to the .facts files
+    of a multi-transaction fact store, so that the facts of many
+    transactions can be analyzed by a single Souffle run.
+
+    Every relation gets the transaction id as an extra first column, and
+    tx.facts lists the transactions in the store. The rules in
+    rules/multi_tx read this layout.
+
+    Args:
+      efg: the graph to be written to logical relations.
+      tx_id: the transaction the graph belongs to, such as its hash.
+    """
+
+    def __init__(self, efg: tac_efg.TACGraph, tx_id: str):
+        super().__init__(efg)
+        self.tx_id = check_tx_id(tx_id)
+        self.__store_dir = None
+
+    def _writer(self, files: contextlib.ExitStack, relation: str, arity: int) \
+        -> "FactWriter":
+        path = os.path.join(self.__store_dir, relation + ".facts")
+        return FactWriter(files.enter_context(open(path, 'a')), self.tx_id + "\t")
+
+    def export(self, store_dir: str = "", out_opcodes=[], relations=None):
+        """
+        Args:
+          store_dir: the fact store to append to, created if it does not exist.
+          out_opcodes: a list of opcode names all occurences thereof to output,
+                       with the names of all argument variables.
+          relations: if not None, the names of the relations whose rows to
+                     append; nothing is appended to the others.
+        """
+        self.__store_dir = store_dir
+        super().export(store_dir, out_opcodes, relations)
+        with open(os.path.join(store_dir, "tx.facts"), 'a') as f:
+            f.write(self.tx_id + "\n")
+
+
+def check_tx_id(tx_id: str) -> str:
+    """
+    Return tx_id if it can be used as a transaction id in a fact store.
+
+    Throws:
+      ValueError: if tx_id is empty or contains characters that would break
+                  the tab-separated fact files.
+    """
+    if tx_id == "" or any(c in tx_id for c in "\t\r\n"):
+        raise ValueError("invalid transaction id '{}'".format(tx_id))
+    return tx_id
+
+
+def append_facts(facts_dir: str, store_dir: str, tx_id: str) -> None:
+    """
+    Append the .facts files of a single transaction, as written by
+    EFGTsvExporter, to a multi-transaction fact store as written by
+    EFGTxStoreExporter.
+
+    Args:
+      facts_dir: the directory of the transaction's .facts files.
+      store_dir: the fact store to append to, created if it does not exist.
+      tx_id: the transaction the facts belong to.
+    """
+    prefix = check_tx_id(tx_id) + "\t"
+    os.makedirs(store_dir, exist_ok=True)
+    for filename in sorted(os.listdir(facts_dir)):
+        if not filename.endswith(".facts"):
+            continue
+        with open(os.path.join(facts_dir, filename)) as facts, \
+             open(os.path.join(store_dir, filename), 'a') as store:
+            store.writelines(prefix + line for line in facts)
+
+    with open(os.path.join(store_dir, "tx.facts"), 'a') as f:
+        f.write(tx_id + "\n")
+
+
+def _anonymize(info: tarfile.TarInfo) -> tarfile.TarInfo:
+    """Drop the owner of an archive member, which is that of the scratch file."""
+    info.uid = info.gid = 0
+    info.uname = info.gname = ""
+    return info
+
+
+def fact_archive_path(output_dir: str, compression: str) -> str:
+    """
+    Return the path of the archive that replaces the facts directory
+    output_dir when writing compressed facts.
+    """
+    return (output_dir.rstrip("/" + os.sep) or "facts") + ".tar." + compression
+
+
+def extract_facts(archive_path: str, output_dir: str = None) -> str:
+    """
+    Extract the .facts files of an archive written by EFGArchiveExporter.
+
+    Args:
+      archive_path: the archive to read.
+      output_dir: the directory to extract the files to. If None, a new
+                  temporary directory is created, which the caller is
+                  responsible for removing.
+
+    Returns:
+      The directory the files were extracted to, for souffle -F.
+    """
+    if output_dir is None:
+        output_dir = tempfile.mkdtemp(prefix="facts-")
+    else:
+        os.makedirs(output_dir, exist_ok=True)
+
+    with tarfile.open(archive_path, "r:*") as tar:
+        for member in tar:
+            # Only plain files directly in the archive are facts; anything
+            # else could be written outside of output_dir
+            name = member.name
+            if not member.isfile() or os.path.basename(name) != name or name.startswith("."):
+                raise ValueError("unexpected member '{}' in fact archive '{}'"
+                                 .format(name, archive_path))
+            with tar.extractfile(member) as facts, \
+                 open(os.path.join(output_dir, name), 'wb') as dst:
+                shutil.copyfileobj(facts, dst)
+
+    return output_dir
+
+
+# The (arguments, results) of the TAC opcodes whose ops do not have the
+# stack arguments and results of their EVM opcode. LOG stands for LOG0 to
+# LOG4, so its rows have up to the arguments of LOG4.
+_TAC_FIELDS = {
+    opcodes.CONST: (1, 1),
+    opcodes.LOG: (opcodes.LOG4.pop, 0),
+    opcodes.THROWI: (1, 0),
+}
+
+
+def op_arity(name: str) -> t.Optional[int]:
+    """
+    Return the greatest number of fields in the op_X relation of the opcode
+    with the given name: its pc, arguments, result if any, loc, call depth
+    and call number. None if there is no such opcode.
+    """
+    opcode = opcodes.OPCODES.get(name.upper())
+    if opcode is None:
+        return None
+    pop, push = _TAC_FIELDS.get(opcode, (opcode.pop, opcode.push))
+    return 1 + pop + push + 3
+
+
+def read_sqlite_facts(db_path: str) -> t.Dict[str, t.List[tuple]]:
+    """
+    Read the relations written by EFGSqliteExporter.
+
+    Returns:
+      A mapping from relation names to their rows, in the order written.
+    """
+    with contextlib.closing(sqlite3.connect(db_path)) as db:
+        tables = [name for name, in db.execute(
+            "SELECT name FROM sqlite_master WHERE type = 'table'")]
+        return {name: [_unpad(row) for row in
+                       db.execute('SELECT * FROM "{}" ORDER BY rowid'.format(name))]
+                for name in tables}
+
+
+def _unpad(row: tuple) -> tuple:
+    """Drop the NULLs a SqliteFactWriter padded a short row with."""
+    end = len(row)
+    while end > 0 and row[end - 1] is None:
+        end -= 1
+    return row if end == len(row) else row[:end]
+
+
+class VariableIds:
+    """
+    The numbers that stand for variable names in facts.
+
+    Variable VN is N, so the ids of the variables the Destackifier creates
+    are read from their names on each lookup, and are not stored. Any other
+    name is given the next negative id, which is remembered.
+    """
+
+    PREFIX = tac_efg.Destackifier.VAR_PREFIX
+
+    def __init__(self):
+        self.__others = {}
+
+    def __getitem__(self, name: str) -> int:
+        if name.startswith(self.PREFIX):
+            number = name[len(self.PREFIX):]
+            if number.isdigit():
+                return int(number)
+        var_id = self.__others.get(name)
+        if var_id is None:
+            var_id = -len(self.__others) - 1
+            self.__others[name] = var_id
+        return var_id
+
+    def names(self) -> t.List[t.Tuple[int, str]]:
+        """Return the (id, name) pairs of the variables with negative ids."""
+        return [(var_id, name) for name, var_id in self.__others.items()]
+
+
+class FactWriter:
+    """
+    Buffers the rows of a .facts file and writes them out in large chunks.
+
+    Rows are sequences of fields appended to rows by the caller, and are
+    written out as tab-separated lines; flush() must be called once they
+    are all in.
+
+    Args:
+      file: the text file to write the rows to.
+      prefix: text written at the start of every line, such as the leading
+              column of a multi-transaction fact store.
+    """
+
+    BUFFER_ROWS = 16384
+    """The number of buffered rows beyond which the owner should flush."""
+
+    def __init__(self, file, prefix: str = ""):
+        self.file = file
+        self.rows = []
+        """Rows not yet written to file."""
+
+        self.__prefix = prefix.replace("%", "%%")
+        self.__templates = {}
+
+    def __template(self, width: int) -> str:
+        """Return the % template of a line of width fields."""
+        template = self.__templates.get(width)
+        if template is None:
+            template = self.__prefix + "\t".join(["%s"] * width) + "\n"
+            self.__templates[width] = template
+        return template
+
+    def flush(self) -> None:
+        """Write all buffered rows to the file."""
+        rows = self.rows
+        if not rows:
+            return
+        widths = set(map(len, rows))
+        if len(widths) == 1:
+            # A single format call for all rows is cheaper than one per row
+            self.file.write((self.__template(widths.pop()) * len(rows))
+                            % tuple(itertools.chain.from_iterable(rows)))
+        else:
+            # Rows of a relation need not have the same number of fields,
+            # e.g. op_LOG holds the rows of LOG0 to LOG4
+            template = self.__template
+            self.file.write("".join([template(len(row)) % tuple(row) for row in rows]))
+        rows.clear()
+
+
+class SqliteFactWriter(FactWriter):
+    """
+    Buffers the rows of a relation and inserts them into the table of the
+    same name in a SQLite database, which is created with arity columns.
+    If arity is None, it is taken from the first rows.
+
+    Rows with fewer fields than the table has columns are padded with NULL,
+    which read_sqlite_facts() drops again, and the table is widened if a row
+    has more.
+    """
+
+    def __init__(self, db: sqlite3.Connection, relation: str, arity: t.Optional[int]):
+        super().__init__(None)
+        self.db = db
+        self.relation = relation
+        self.__arity = 0
+        self.__insert = None
+        if arity is not None:
+            self.__widen(arity)
+
+    def __widen(self, arity: int) -> None:
+        columns = ["c{}".format(i) for i in range(self.__arity + 1, arity + 1)]
+        if self.__arity == 0:
+            self.db.execute('CREATE TABLE "{}" ({})'.format(self.relation, ", ".join(columns)))
+        else:
+            for column in columns:
+                self.db.execute('ALTER TABLE "{}" ADD COLUMN {}'.format(self.relation, column))
+        self.__arity = arity
+        self.__insert = 'INSERT INTO "{}" VALUES ({})'.format(
+            self.relation, ", ".join(["?"] * arity))
+
+    def flush(self) -> None:
+        """Insert all buffered rows into the table."""
+        rows = self.rows
+        arity = max(map(len, rows), default=1)
+        if arity > self.__arity:
+            # Create a table even for an unknown relation without any rows,
+            # as Souffle fails on a missing input table
+            self.__widen(arity)
+        arity = self.__arity
+        if rows:
+            self.db.executemany(self.__insert, (
+                row if len(row) == arity else tuple(row) + (None,) * (arity - len(row))
+                for row in rows))
+            rows.clear()
 
 
 class EFGStringExporter(Exporter, patterns.DynamicVisitor):
@@ -46,6 +46,8 @@ VAR_RESULT_NAME = "Res"
 class Location(abc.ABC):
     """A generic storage location: variables, memory, static storage."""
 
+    __slots__ = ()
+
     @property
     def identifier(self) -> str:
         """Return the string identifying this object."""
@@ -392,6 +394,152 @@ class Variable(ssle, Location):
         return (v >> ((cls.SIZE - b) * 8)) & 0xFF
 
 
+class ConcreteVariable(Location):
+    """
+    A variable holding a single concrete value taken from a transaction trace,
+    or no known value (Top) until one is folded into it.
+
+    This is a compact stand-in for Variable in the TAC generated from traces,
+    where every value is concrete: it stores one integer rather than a set,
+    and its def site as a plain pc, from which def_sites is only built when
+    it is asked for.
+    """
+
+    __slots__ = ("name", "const_value", "def_pc", "def_block")
+
+    SIZE = Variable.SIZE
+    CARDINALITY = Variable.CARDINALITY
+
+    def __init__(self, value: int = None, name: str = VAR_DEFAULT_NAME,
+                 def_pc: int = None):
+        """
+        Args:
+          value: the value of this variable, or None if it is unconstrained.
+          name: the name that uniquely identifies this variable.
+          def_pc: the pc where this variable was defined, if it has a def site.
+        """
+        self.name = name
+        self.const_value = None if value is None else value % self.CARDINALITY
+        """The value of this variable, or None if it is unconstrained."""
+        self.def_pc = def_pc
+        self.def_block = None
+        """The block containing the def site, set once the block is built."""
+
+    def __deepcopy__(self, memodict={}):
+        new_var = type(self)(self.const_value, self.name, self.def_pc)
+        new_var.def_block = self.def_block
+        return new_var
+
+    @property
+    def values(self) -> 'ConstantVariable':
+        """
+        The value this variable contains, as a ConstantVariable of the same
+        name. It refers neither to this variable nor to its def site, so it
+        can be kept without keeping the block that defined it alive.
+        """
+        return ConstantVariable(self.const_value, self.name)
+
+    @values.setter
+    def values(self, vals: t.Iterable):
+        """
+        Set this variable's value. Anything but a single value, such as Top,
+        leaves it unconstrained.
+
+        Args:
+          vals: an iterable of values that this variable will hold
+        """
+        if getattr(vals, "is_top", False):
+            self.const_value = None
+            return
+        vals = {v % self.CARDINALITY for v in vals}
+        self.const_value = vals.pop() if len(vals) == 1 else None
+
+    @property
+    def value(self) -> set:
+        """The value set of this variable, as held by a SubsetLatticeElement."""
+        if self.const_value is None:
+            return ssle._top_val()
+        return {self.const_value}
+
+    @property
+    def def_sites(self) -> ssle:
+        """The set of locations (TACLocRefs) where this variable was defined."""
+        if self.def_pc is None:
+            return ssle.bottom()
+        from src.tac_efg import TACLocRef
+        return ssle([TACLocRef(self.def_block, self.def_pc)])
+
+    @property
+    def identifier(self) -> str:
+        """Return the string identifying this object."""
+        return self.name
+
+    @property
+    def is_const(self) -> bool:
+        return self.const_value is not None
+
+    @property
+    def is_finite(self) -> bool:
+        return self.const_value is not None
+
+    @property
+    def is_unconstrained(self) -> bool:
+        return self.const_value is None
+
+    @property
+    def is_top(self) -> bool:
+        return self.const_value is None
+
+    @property
+    def is_bottom(self) -> bool:
+        return False
+
+    def widen_to_top(self) -> None:
+        """Forget the value of this variable."""
+        self.const_value = None
+
+    def __len__(self):
+        return 0 if self.const_value is None else 1
+
+    def __iter__(self):
+        if self.const_value is None:
+            raise TypeError("Top lattice element cannot be iterated.")
+        return iter((self.const_value,))
+
+    def __str__(self):
+        if self.const_value is None:
+            return self.name
+        return hex(self.const_value)
+
+    def __repr__(self):
+        return "<{0} object {1}, {2}>".format(
+            self.__class__.__name__,
+            hex(id(self)),
+            self.__str__()
+        )
+
+
+class ConstantVariable(ConcreteVariable):
+    """
+    A ConcreteVariable whose value can never change, so that a single
+    instance can be shared by every use of the same constant.
+    """
+
+    __slots__ = ()
+
+    @property
+    def values(self) -> 'ConstantVariable':
+        """The value set this Variable contains."""
+        return self
+
+    @values.setter
+    def values(self, vals: t.Iterable):
+        raise TypeError("The value of a constant cannot be changed.")
+
+    def widen_to_top(self) -> None:
+        raise TypeError("The value of a constant cannot be changed.")
+
+
 class MetaVariable(Variable):
     """A Variable to stand in for Variables."""
 
@@ -549,12 +697,26 @@ class VariableStack(LatticeElement):
 
     def dup(self, n: int) -> None:
         """Place a copy of stack[n-1] on the top of the stack."""
+        value = self.value
+        if len(value) >= n:
+            # Permute in place; a full stack discards the copy, as push() would
+            if len(value) < self.max_size:
+                value.append(value[-n])
+            return
+
+        # Reaching past the bottom generates metavariables for the missing slots
         items = self.pop_many(n)
         duplicated = [items[-1]] + items
         self.push_many(reversed(duplicated))
 
     def swap(self, n: int) -> None:
-        """Swap stack[0] with stack[n]."""
+        """Swap stack[0] with stack[n-1]."""
+        value = self.value
+        if len(value) >= n:
+            value[-1], value[-n] = value[-n], value[-1]
+            return
+
+        # Reaching past the bottom generates metavariables for the missing slots
         items = self.pop_many(n)
         swapped = [items[-1]] + items[1:-1] + [items[0]]
         self.push_many(reversed(swapped))
@@ -598,3 +760,259 @@ class VariableStack(LatticeElement):
         yields an empty stack.
         """
         return super().join_all(elements, initial=VariableStack())
+
+
+class PagedMemory:
+    """
+    A sparse, byte-addressed memory, such as the memory of an EVM frame.
+
+    Memory is divided into pages of PAGE_SIZE bytes, which are only allocated
+    once something other than zeros is written to them, and reading memory
+    that was never written yields zeros without allocating anything. The
+    space used thus follows the bytes actually written rather than the
+    highest offset written to.
+    """
+
+    PAGE_SIZE = 4096
+    """The size of a memory page, in bytes."""
+
+    def __init__(self):
+        self.pages = {}
+        """Mapping from page numbers to the bytearrays holding those pages."""
+
+        self.size = 0
+        """One past the highest offset written to so far."""
+
+    def __len__(self):
+        return self.size
+
+    def __spans(self, offset: int, length: int) \
+        -> t.Generator[t.Tuple[int, int, int, int], None, None]:
+        """
+        Split length bytes from offset into (page number, start, end, position)
+        chunks, where start and end are offsets within the page, and position
+        is the offset of the chunk from the beginning of the range.
+        """
+        pos = 0
+        while pos < length:
+            page_no, start = divmod(offset + pos, self.PAGE_SIZE)
+            end = min(self.PAGE_SIZE, start + length - pos)
+            yield page_no, start, end, pos
+            pos += end - start
+
+    def read(self, offset: int, length: int) -> bytes:
+        """Return length bytes from offset; bytes never written are zero."""
+        result = bytearray(length)
+        for page_no, start, end, pos in self.__spans(offset, length):
+            page = self.pages.get(page_no)
+            if page is not None:
+                result[pos: pos + end - start] = page[start:end]
+        return bytes(result)
+
+    def write(self, offset: int, data: bytes) -> None:
+        """Write data to memory at offset."""
+        for page_no, start, end, pos in self.__spans(offset, len(data)):
+            chunk = data[pos: pos + end - start]
+            page = self.pages.get(page_no)
+            if page is None:
+                # Untouched pages already read as zeros
+                if chunk.count(0) == len(chunk):
+                    continue
+                page = self.pages[page_no] = bytearray(self.PAGE_SIZE)
+            page[start:end] = chunk
+
+        if len(data) > 0:
+            self.size = max(self.size, offset + len(data))
+
+    def write_int(self, offset: int, length: int, value: int) -> None:
+        """
+        Write value to memory at offset as a big-endian integer of length bytes.
+
+        Throws:
+          OverflowError: if value does not fit in length bytes.
+        """
+        page_no, start = divmod(offset, self.PAGE_SIZE)
+        if 0 < length <= self.PAGE_SIZE - start:
+            # The common case of a word within a single page
+            data = value.to_bytes(length, byteorder='big')
+            page = self.pages.get(page_no)
+            if page is None and value != 0:
+                page = self.pages[page_no] = bytearray(self.PAGE_SIZE)
+            if page is not None:
+                page[start: start + length] = data
+            self.size = max(self.size, offset + length)
+            return
+
+        data = value.to_bytes((value.bit_length() + 7) // 8, byteorder='big')
+        if len(data) > length:
+            raise OverflowError("int too big to convert")
+
+        self.clear(offset, length - len(data))
+        self.write(offset + length - len(data), data)
+        if length > 0:
+            self.size = max(self.size, offset + length)
+
+    def clear(self, offset: int, length: int) -> None:
+        """Set length bytes from offset to zero, releasing any whole pages."""
+        if length <= 0:
+            return
+
+        first = offset // self.PAGE_SIZE
+        last = (offset + length - 1) // self.PAGE_SIZE
+        if last - first >= len(self.pages):
+            # A large range: only visit the pages that exist
+            page_nos = [p for p in self.pages if first <= p <= last]
+        else:
+            page_nos = [p for p in range(first, last + 1) if p in self.pages]
+
+        for page_no in page_nos:
+            base = page_no * self.PAGE_SIZE
+            start = max(offset, base) - base
+            end = min(offset + length, base + self.PAGE_SIZE) - base
+            if start == 0 and end == self.PAGE_SIZE:
+                del self.pages[page_no]
+            else:
+                self.pages[page_no][start:end] = bytes(end - start)
+
+
+
+class CallFrame:
+    """
+    A call frame of a transaction: the call_number of its first op, the
+    address of the contract whose storage it uses, if it is known, its
+    memory, and the storage writes it made while that address was unknown.
+    """
+    __slots__ = ("call_number", "address", "memory", "writes")
+
+    def __init__(self, call_number: int, address: int = None):
+        self.call_number = call_number
+        self.address = address
+        self.memory = PagedMemory()
+        self.writes = {}
+
+
+class CallFrames:
+    """
+    The call frames of a transaction that are active at some point of its
+    trace, from the outermost one in, each with its own PagedMemory and the
+    address of the contract whose storage it uses, if it is known.
+
+    geth records a call once the frame it entered has returned, so the
+    storage address of a called frame is usually only known then. A frame
+    keeps the storage writes it makes until its address is known, from an
+    ADDRESS op in it or from the call that entered it, and they are then
+    moved to the storage of that address. Writes whose address is never
+    known are stored under None.
+
+    The storage argument of the methods maps each address to the values
+    stored in its slots. Once a frame returns, its memory is released.
+    """
+
+    def __init__(self):
+        self.frames = []
+        """The active CallFrames, outermost first."""
+
+        self.returned = None
+        """The CallFrame that returned last, until the call that entered it is seen."""
+
+    def __len__(self):
+        return len(self.frames)
+
+    def enter(self, storage: dict, call_number: int, call_depth: int) -> None:
+        """
+        Start a new frame at the given call depth (1 for the outermost frame).
+        Any frames at the same depth or deeper have returned.
+        """
+        self.resume(storage, call_depth - 1, call_number)
+        self.__settle(storage, self.returned, None)
+        self.returned = None
+        self.frames.append(CallFrame(call_number))
+
+    def resume(self, storage: dict, call_depth: int, call_number: int = None) -> None:
+        """
+        Return to the frame at the given call depth, releasing the frames it
+        called; the one it called directly becomes the returned frame. Frames
+        missing above it, such as those of a trace that does not start at
+        the outermost frame, are started with call_number.
+        """
+        call_depth = max(call_depth, 0)
+        self.__settle(storage, self.returned, None)
+        self.returned = None
+        if len(self.frames) > call_depth:
+            self.returned = self.frames[call_depth]
+            for frame in self.frames[call_depth + 1:]:
+                self.__settle(storage, frame, None)
+            del self.frames[call_depth:]
+        while len(self.frames) < call_depth:
+            self.frames.append(CallFrame(call_number))
+
+    def call_returned(self, storage: dict, address: t.Optional[int],
+                      shared: bool = False) -> None:
+        """
+        Note the call of the current frame that entered the returned frame,
+        if any, which used the storage of address, or that of the current
+        frame if shared, as a DELEGATECALL or CALLCODE does.
+        """
+        frame, self.returned = self.returned, None
+        if frame is None:
+            return
+        if shared:
+            self.__store_all(storage, self.__current(), frame.writes)
+        else:
+            self.__settle(storage, frame, address)
+
+    def close(self, storage: dict) -> None:
+        """Store the writes of every frame whose address is still unknown under None."""
+        self.__settle(storage, self.returned, None)
+        self.returned = None
+        for frame in self.frames:
+            self.__settle(storage, frame, None)
+
+    def store(self, storage: dict, key, value: t.Optional[int]) -> None:
+        """Record that the current frame stored value in the slot key."""
+        frame = self.__current()
+        if frame.address is None:
+            frame.writes[key] = value
+        else:
+            storage[frame.address][key] = value
+
+    @property
+    def call_number(self) -> int:
+        """The call_number of the current frame."""
+        return self.frames[-1].call_number if len(self.frames) > 0 else None
+
+    @property
+    def address(self) -> t.Optional[int]:
+        """The storage address of the current frame, or None if it is not known."""
+        return self.frames[-1].address if len(self.frames) > 0 else None
+
+    def set_address(self, storage: dict, address: t.Optional[int]) -> None:
+        """Set the storage address of the current frame, as read by an ADDRESS op."""
+        frame = self.__current()
+        frame.address = address
+        if address is not None:
+            self.__settle(storage, frame, address)
+
+    @property
+    def memory(self) -> PagedMemory:
+        """The memory of the current frame."""
+        return self.__current().memory
+
+    def __current(self) -> CallFrame:
+        if len(self.frames) == 0:
+            self.frames.append(CallFrame(None))
+        return self.frames[-1]
+
+    def __store_all(self, storage: dict, frame: CallFrame, writes: dict) -> None:
+        """Record writes as made by frame."""
+        if frame.address is None:
+            frame.writes.update(writes)
+        else:
+            storage[frame.address].update(writes)
+
+    @staticmethod
+    def __settle(storage: dict, frame: t.Optional[CallFrame], address: t.Optional[int]) -> None:
+        """Move the writes frame kept to the storage of address."""
+        if frame is not None and len(frame.writes) > 0:
+            storage[address].update(frame.writes)
+            frame.writes = {}
@@ -30,6 +30,86 @@
 """opcodes.py: Definitions of all EVM opcodes, and related utility functions."""
 
 
+# Opcode classification flags. Each OpCode computes its flags once, when it
+# is constructed, so that the predicates below are a single mask test; hot
+# loops may also test several at once, e.g.
+# opcode.flags & (KIND_FOUR | KIND_FIVE).
+KIND_ONE = 1 << 0
+KIND_TWO = 1 << 1
+KIND_THREE_LOAD = 1 << 2
+KIND_THREE_STORE_ONE = 1 << 3
+KIND_THREE_STORE_TWO = 1 << 4
+KIND_FOUR = 1 << 5
+KIND_FIVE = 1 << 6
+PUSH_OP = 1 << 7
+SWAP_OP = 1 << 8
+DUP_OP = 1 << 9
+LOG_OP = 1 << 10
+ARITHMETIC = 1 << 11
+MEMORY = 1 << 12
+STORAGE = 1 << 13
+HALTS = 1 << 14
+POSSIBLY_HALTS = 1 << 15
+
+_KIND_ONE_NAMES = {"ADDRESS", "ORIGIN", "CALLER", "CALLVALUE", "CALLDATASIZE",
+                   "CODESIZE", "GASPRICE", "RETURNDATASIZE", "COINBASE", "TIMESTAMP",
+                   "NUMBER", "DIFFICULTY", "GASLIMIT", "PC", "MSIZE", "GAS"}
+_KIND_TWO_NAMES = {"SHA3", "BALANCE", "CALLDATALOAD", "EXTCODESIZE", "BLOCKHASH"}
+_KIND_THREE_STORE_ONE_NAMES = {"MSTORE", "MSTORE8", "SSTORE"}
+_KIND_THREE_STORE_TWO_NAMES = {"CALLDATACOPY", "CODECOPY", "EXTCODECOPY", "RETURNDATACOPY"}
+_KIND_FOUR_NAMES = {"CALL", "CALLCODE", "DELEGATECALL", "STATICCALL"}
+_KIND_FIVE_NAMES = {"CREATE", "CREATE2"}
+# STOP, RETURN, SELFDESTRUCT, THROW, REVERT and INVALID
+_HALT_CODES = {0x00, 0xf3, 0xff, -4, 0xfd, 0xfe}
+_THROWI_CODE = -5
+
+
+def _classify(name: str, code: int) -> int:
+    """
+    Return the classification flags of the opcode with the given name and
+    instruction byte.
+
+    Opcodes missing from BYTECODES also halt; as that depends on the full
+    opcode table, OpCode.halts() and OpCode.possibly_halts() check it
+    separately.
+    """
+    flags = 0
+    if name in _KIND_ONE_NAMES:
+        flags |= KIND_ONE
+    if name in _KIND_TWO_NAMES:
+        flags |= KIND_TWO
+    if name == "SLOAD":
+        flags |= KIND_THREE_LOAD
+    if name in _KIND_THREE_STORE_ONE_NAMES:
+        flags |= KIND_THREE_STORE_ONE
+    if name in _KIND_THREE_STORE_TWO_NAMES:
+        flags |= KIND_THREE_STORE_TWO
+    if name in _KIND_FOUR_NAMES:
+        flags |= KIND_FOUR
+    if name in _KIND_FIVE_NAMES:
+        flags |= KIND_FIVE
+    if 0x60 <= code <= 0x7f:
+        flags |= PUSH_OP
+    if 0x90 <= code <= 0x9f:
+        flags |= SWAP_OP
+    if 0x80 <= code <= 0x8f:
+        flags |= DUP_OP
+    if 0xa0 <= code <= 0xa4:
+        flags |= LOG_OP
+    # ADD to SIGNEXTEND, and LT to BYTE
+    if 0x01 <= code <= 0x0b or 0x10 <= code <= 0x1a:
+        flags |= ARITHMETIC
+    if 0x51 <= code <= 0x53:
+        flags |= MEMORY
+    if 0x54 <= code <= 0x55:
+        flags |= STORAGE
+    if code in _HALT_CODES:
+        flags |= HALTS | POSSIBLY_HALTS
+    if code == _THROWI_CODE:
+        flags |= POSSIBLY_HALTS
+    return flags
+
+
 class OpCode:
     """An EVM opcode."""
 
@@ -45,6 +125,7 @@ class OpCode:
         self.code = code
         self.pop = pop
         self.push = push
+        self.flags = _classify(name, code)
 
     def stack_delta(self) -> int:
         """Return the net effect on the stack size of running this operation."""
@@ -69,42 +150,33 @@ class OpCode:
     # Special cases for kind one, such as CALLVALUE
     # Those opcodes do not need anything from stack, but will give related dynamic info
     def is_kind_one(self) -> bool:
-        special = {ADDRESS.name, ORIGIN.name, CALLER.name, CALLVALUE.name, CALLDATASIZE.name,
-                   CODESIZE.name, GASPRICE.name, RETURNDATASIZE.name, COINBASE.name, TIMESTAMP.name,
-                   NUMBER.name, DIFFICULTY.name, GASLIMIT.name, PC.name, MSIZE.name, GAS.name}
-        return self.name in special
+        return self.flags & KIND_ONE != 0
 
     # Special cases for kind two, such as CALLDATALOAD
     # Need one or more stack arguments and related dynamic info
     def is_kind_two(self) -> bool:
-        special = {SHA3.name, BALANCE.name, CALLDATALOAD.name, EXTCODESIZE.name, BLOCKHASH.name}
-        return self.name in special
+        return self.flags & KIND_TWO != 0
 
     # Special cases for part of kind three load, SLOAD
     def is_kind_three_load(self) -> bool:
-        special = {SLOAD.name}
-        return self.name in special
+        return self.flags & KIND_THREE_LOAD != 0
 
     # Special cases for part of kind three store, like MSTORE
     def is_kind_three_store_one(self) -> bool:
-        special = {MSTORE.name, MSTORE8.name, SSTORE.name}
-        return self.name in special
+        return self.flags & KIND_THREE_STORE_ONE != 0
 
     # Special cases for some other store operations, they are special
     # since they do need some arguments from the stack and then get the related data
     # to store them into the memory
     def is_kind_three_store_two(self) -> bool:
-        special = {CALLDATACOPY.name, CODECOPY.name, EXTCODECOPY.name, RETURNDATACOPY.name}
-        return self.name in special
+        return self.flags & KIND_THREE_STORE_TWO != 0
 
     # Special cases for four call opcodes
     def is_kind_four(self) -> bool:
-        special = {CALL.name, CALLCODE.name, DELEGATECALL.name, STATICCALL.name}
-        return self.name in special
+        return self.flags & KIND_FOUR != 0
 
     def is_kind_five(self) -> bool:
-        special = {CREATE.name, CREATE2.name}
-        return self.name in special
+        return self.flags & KIND_FIVE != 0
 
     def op_pc_gap(self) -> int:
         if self.is_push():
@@ -114,19 +186,19 @@ class OpCode:
 
     def is_push(self) -> bool:
         """Predicate: opcode is a push operation."""
-        return PUSH1.code <= self.code <= PUSH32.code
+        return self.flags & PUSH_OP != 0
 
     def is_swap(self) -> bool:
         """Predicate: opcode is a swap operation."""
-        return SWAP1.code <= self.code <= SWAP16.code
+        return self.flags & SWAP_OP != 0
 
     def is_dup(self) -> bool:
         """Predicate: opcode is a dup operation."""
-        return DUP1.code <= self.code <= DUP16.code
+        return self.flags & DUP_OP != 0
 
     def is_log(self) -> bool:
         """Predicate: opcode is a log operation."""
-        return LOG0.code <= self.code <= LOG4.code
+        return self.flags & LOG_OP != 0
 
     def is_missing(self) -> bool:
         return self.code not in BYTECODES
@@ -136,20 +208,19 @@ class OpCode:
 
     def is_arithmetic(self) -> bool:
         """Predicate: opcode's result can be calculated from its inputs alone."""
-        return (ADD.code <= self.code <= SIGNEXTEND.code) or \
-               (LT.code <= self.code <= BYTE.code)
+        return self.flags & ARITHMETIC != 0
 
     def is_memory(self) -> bool:
         """Predicate: opcode operates on memory"""
-        return MLOAD.code <= self.code <= MSTORE8.code
+        return self.flags & MEMORY != 0
 
     def is_storage(self) -> bool:
         """Predicate: opcode operates on storage ('the tape')"""
-        return SLOAD.code <= self.code <= SSTORE.code
+        return self.flags & STORAGE != 0
 
     def is_call(self) -> bool:
         """Predicate: opcode calls an external contract"""
-        return self in (CALL, CALLCODE, DELEGATECALL, STATICCALL,)
+        return self.flags & KIND_FOUR != 0
 
     def alters_flow(self) -> bool:
         """Predicate: opcode alters EVM control flow."""
@@ -162,18 +233,11 @@ class OpCode:
 
     def halts(self) -> bool:
         """Predicate: opcode causes the EVM to halt."""
-        halt_codes = (
-            STOP.code,
-            RETURN.code,
-            SELFDESTRUCT.code,
-            THROW.code,
-            REVERT.code,
-        )
-        return (self.code in halt_codes) or self.is_invalid()
+        return self.flags & HALTS != 0 or self.is_missing()
 
     def possibly_halts(self) -> bool:
         """Predicate: opcode MAY cause the EVM to halt. (halts + THROWI)"""
-        return self.halts() or self.code == THROWI.code
+        return self.flags & POSSIBLY_HALTS != 0 or self.is_missing()
 
     def push_len(self) -> int:
         """Return the number of bytes the given PUSH instruction pushes."""
@@ -0,0 +1,96 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""rules.py: find the relations that Souffle rule files read from the facts."""
+
+import os
+import re
+import typing as t
+
+_TOKENS = re.compile(r'"(?:[^"\\\n]|\\.)*"|//[^\n]*|/\*.*?\*/', re.DOTALL)
+"""String literals and comments, which may contain anything."""
+_INCLUDE = re.compile(r'^\s*#include\s+"([^"]+)"', re.MULTILINE)
+_DECL = re.compile(r'\.decl\s+\w+\s*\([^)]*\)')
+_IO = re.compile(r'\.(input|output|printsize)\s+(\w+(?:\s*,\s*\w+)*)(?:\s*\([^)]*\))?')
+_DIRECTIVE = re.compile(r'^\s*[.#][^\n]*', re.MULTILINE)
+_ATOM = re.compile(r'\b(\w+)\s*\(')
+
+
+class RuleSet:
+    """
+    The input relations of a set of Souffle rule files, and which of them
+    the rules actually read.
+
+    opcode.dl declares every relation the exporter can write as an input,
+    so the inputs of a rule file say little about what it uses; a relation
+    is read only if it appears in the body or head of a clause.
+
+    Args:
+      paths: the rule files. Files they #include are read as well.
+    """
+
+    def __init__(self, paths: t.Iterable[str]):
+        self.inputs = set()
+        """The relations declared as .input."""
+
+        self.read = set()
+        """The input relations that appear in a clause."""
+
+        atoms = set()
+        seen = set()
+        for path in paths:
+            self.__parse(path, seen, atoms)
+        self.read = self.inputs & atoms
+
+    def __parse(self, path: str, seen: t.Set[str], atoms: t.Set[str]) -> None:
+        path = os.path.abspath(path)
+        if path in seen:
+            return
+        seen.add(path)
+
+        with open(path) as f:
+            text = f.read()
+
+        # Blank out comments, so that commented out #includes are skipped,
+        # then literals, which may look like atoms
+        text = _TOKENS.sub(lambda m: m.group() if m.group().startswith('"') else " ", text)
+        for include in _INCLUDE.findall(text):
+            self.__parse(os.path.join(os.path.dirname(path), include), seen, atoms)
+        text = _TOKENS.sub('""', text)
+        text = _DECL.sub(" ", text)
+        for kind, names in _IO.findall(text):
+            if kind == "input":
+                self.inputs.update(n.strip() for n in names.split(","))
+        text = _IO.sub(" ", text)
+        text = _DIRECTIVE.sub(" ", text)
+        atoms.update(_ATOM.findall(text))
+
+    def opcodes(self) -> t.List[str]:
+        """Return the opcodes X whose op_X relation is an input, sorted."""
+        return sorted(name[len("op_"):] for name in self.inputs if name.startswith("op_"))
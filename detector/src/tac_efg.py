@@ -39,17 +39,52 @@ import src.memtypes as mem
 import src.opcodes as opcodes
 import src.patterns as patterns
 import src.settings as settings
-from src.lattice import SubsetLatticeElement as ssle
 
 POSTDOM_END_NODE = "END"
 """The name of the synthetic end node added for post-dominator calculations."""
 UNRES_DEST = "?"
 """The name of the unresolved jump destination auxiliary node."""
 
-def remove_0x(temptstr):
-    if temptstr.startswith("0x"):
-        return temptstr[2:]
-    return temptstr
+ARITH_FUNCTIONS = {code: getattr(mem.Variable, opcode.name)
+                   for code, opcode in opcodes.BYTECODES.items()
+                   if opcode.is_arithmetic()}
+"""Integer implementations of the arithmetic opcodes, keyed by opcode byte."""
+
+VALUE_FROM_TRACE = "trace"
+"""The value_source of a variable whose value was recorded by geth."""
+VALUE_FOLDED = "folded"
+"""The value_source of a variable whose value was computed by constant folding."""
+
+
+def fold_arithmetic(op: 'TACAssignOp', use_sets: bool = False) -> None:
+    """
+    Compute the value of the variable assigned by the given arithmetic op from
+    the values of its arguments, or widen it to Top if they are unknown.
+
+    If use_sets is True, folding will also be done on arguments that possess
+    multiple possible values, in all possible combinations of values.
+
+    The value_source of op is set to VALUE_FOLDED if a value is computed,
+    and to None otherwise.
+    """
+    values = [arg.value.const_value for arg in op.args]
+    if None not in values:
+        # Every argument has a single value: evaluate the op on ints
+        # directly, without building any value sets
+        result = ARITH_FUNCTIONS[op.opcode.code](*values) % mem.Variable.CARDINALITY
+        if isinstance(op.lhs, mem.ConcreteVariable):
+            op.lhs.const_value = result
+        else:
+            op.lhs.values = [result]
+        op.value_source = VALUE_FOLDED
+    elif op.constrained_args() and use_sets:
+        rhs = [arg.value for arg in op.args]
+        op.lhs.values = mem.Variable.arith_op(op.opcode.name, rhs).values
+        op.value_source = VALUE_FOLDED
+    else:
+        if not op.lhs.is_unconstrained:
+            op.lhs.widen_to_top()
+        op.value_source = None
 
 
 class TACGraph(cfg.ControlFlowGraph):
@@ -57,7 +92,8 @@ class TACGraph(cfg.ControlFlowGraph):
     A execution flow graph holding Three-Address Code blocks and the edges between them.
     """
 
-    def __init__(self, evm_blocks: t.Iterable[evm_efg.EVMBasicBlock]):
+    def __init__(self, evm_blocks: t.Iterable[evm_efg.EVMBasicBlock],
+                 trust_values: bool = False):
         """
         Construct a TAC execution flow graph from a given sequence of EVM blocks.
         Immediately after conversion, constants will be propagated and folded
@@ -66,11 +102,15 @@ class TACGraph(cfg.ControlFlowGraph):
 
         Args:
           evm_blocks: an iterable of EVMBasicBlocks to convert into TAC form.
+          trust_values: if True, take the values recorded in the trace as they
+                        are and fold the remaining constants during conversion,
+                        skipping the apply_operations() pass. The stack_values
+                        and frames of the graph are then left empty.
         """
         super().__init__()
 
         # Convert the input EVM blocks to TAC blocks.
-        destack = Destackifier()
+        destack = Destackifier(fold_constants=trust_values)
 
         # Create a whole global stack to store all the tempt_stacks to deal with multiple smart contracts
         stacks = []
@@ -102,12 +142,15 @@ class TACGraph(cfg.ControlFlowGraph):
 
         # Add some fields to store stack and memory values
         # This function is not used in our work
+        # Storage values are kept per contract address, as ints; the memory
+        # of a call frame is released once it returns
         self.stack_values = defaultdict(dict)
-        self.memory = bytearray()
+        self.frames = mem.CallFrames()
 
         # Propagate constants and add EFG edges.
         # Assgin the opcode related value to memory and stack
-        self.apply_operations()
+        if not trust_values:
+            self.apply_operations()
 
         # Connect all the edges
         for i, b in enumerate(self.blocks):
@@ -118,35 +161,24 @@ class TACGraph(cfg.ControlFlowGraph):
 
     # Accept extracted argument from the opcode
     @classmethod
-    def from_opcode(cls, opcode: t.Iterable) -> 'TACGraph':
+    def from_opcode(cls, opcode: t.Iterable, trust_values: bool = False) -> 'TACGraph':
         """
         Construct and return a TACGraph from the given geth opcode.
 
         Args:
           opcode: a sequence of EVM opcode, either in a hexadecimal string format or a byte array.
+          trust_values: see TACGraph().
         """
-        original_opcodes = []
-        for l in opcode:
-            if len(l.strip()) > 0:
-                # One example of the opcode line: 0; PUSH1; 0x64, which represents <PC; OPCODE NAME; ARGS>
-                args = l.strip().split(";")
-                if args[2] == "":
-                    original_opcodes.append(evm_efg.EVMOp(int(args[0]), opcodes.opcode_by_name(args[1]), None, None))
-                else:
-                    if "," in args[2]:
-                        args_extras = args[2].strip().split(",")
-                        original_opcodes.append(evm_efg.EVMOp(int(args[0]), opcodes.opcode_by_name(args[1]),
-                                                           int(args_extras[0]), int(args_extras[1])))
-                    else:
-                        if opcodes.opcode_by_name(args[1]).name == opcodes.SELFDESTRUCT.name:
-                            addr = int(args[2], 0)
-                            original_opcodes.append(evm_efg.EVMOp(int(args[0]), opcodes.opcode_by_name(args[1]), addr, None))
-                        else:
-                            original_opcodes.append(evm_efg.EVMOp(int(args[0]), opcodes.opcode_by_name(args[1]), int(args[2]), None))
+        return cls.from_ops(evm_efg.ops_from_trace(opcode), trust_values)
 
-        # Obtain evm opcode based EFG firstly 
-        basic_blocks = evm_efg.blocks_from_ops(original_opcodes)
-        return cls(basic_blocks)
+    @classmethod
+    def from_ops(cls, ops: t.Iterable[evm_efg.EVMOp], trust_values: bool = False) -> 'TACGraph':
+        """
+        Construct and return a TACGraph from a sequence of EVMOps, such as
+        one decoded from a binary trace.
+        """
+        # Annotate and split the trace into blocks in a single forward pass
+        return cls(evm_efg.iter_blocks(ops), trust_values)
 
     @property
     def tac_ops(self):
@@ -170,7 +202,8 @@ class TACGraph(cfg.ControlFlowGraph):
         """
         for block in self.blocks:
             # Add stack and memory for the whole TAC-based EFG and store the related value from geth to memory, stack
-            block.apply_operations(self.stack_values, self.memory, use_sets)
+            block.apply_operations(self.stack_values, self.frames, use_sets)
+        self.frames.close(self.stack_values)
 
     def connectEFGNode(self):
         if len(list(self.blocks)) > 1:
@@ -196,6 +229,69 @@ class TACGraph(cfg.ControlFlowGraph):
         self.function_extractor = fe
 
 
+class TACStream:
+    """
+    A single-pass stream of TAC blocks generated from a geth trace.
+
+    Unlike TACGraph, blocks are converted and have their constants folded one
+    at a time as they are consumed, and are not retained afterwards, so the
+    whole trace is never held in memory at once. Blocks are not linked to
+    each other, and the blocks property can only be iterated once.
+    """
+
+    def __init__(self, evm_blocks: t.Iterable[evm_efg.EVMBasicBlock],
+                 trust_values: bool = False):
+        """
+        Args:
+          evm_blocks: an iterable of EVMBasicBlocks to convert into TAC form.
+          trust_values: as for TACGraph.
+        """
+        self.evm_blocks = evm_blocks
+        """The source EVM blocks, typically a generator."""
+
+        self.trust_values = trust_values
+        """If True, constants are folded during conversion, see TACGraph."""
+
+        # Stack and memory values, as in TACGraph
+        self.stack_values = defaultdict(dict)
+        self.frames = mem.CallFrames()
+
+    @classmethod
+    def from_opcode(cls, opcode: t.Iterable, trust_values: bool = False) -> 'TACStream':
+        """
+        Construct and return a TACStream from the given geth opcode.
+
+        Args:
+          opcode: a sequence of geth trace lines, such as an open text file.
+          trust_values: see TACGraph().
+        """
+        return cls.from_ops(evm_efg.ops_from_trace(opcode), trust_values)
+
+    @classmethod
+    def from_ops(cls, ops: t.Iterable[evm_efg.EVMOp], trust_values: bool = False) -> 'TACStream':
+        """
+        Construct and return a TACStream from a sequence of EVMOps.
+        """
+        return cls(evm_efg.iter_blocks(ops), trust_values)
+
+    @property
+    def blocks(self) -> t.Generator['TACBasicBlock', None, None]:
+        """
+        Generate TACBasicBlocks in trace order, converting each EVM block
+        and folding its constants only when it is requested.
+        """
+        destack = Destackifier(fold_constants=self.trust_values)
+        stacks = []
+
+        for i, b in enumerate(self.evm_blocks):
+            tac_block = destack.convert_block(b, stacks)
+            tac_block.index = i
+            if not self.trust_values:
+                tac_block.apply_operations(self.stack_values, self.frames)
+            yield tac_block
+        self.frames.close(self.stack_values)
+
+
 class TACBasicBlock(evm_efg.EVMBasicBlock):
     """
     A basic block containing both three-address code, and its
@@ -332,38 +428,70 @@ class TACBasicBlock(evm_efg.EVMBasicBlock):
             op.block = self
         for op in self.tac_ops:
             op.block = self
-            if isinstance(op, TACAssignOp) and isinstance(op.lhs, mem.Variable):
-                for site in op.lhs.def_sites:
-                    site.block = self
-
-    def apply_operations(self, stack_values: defaultdict, memory: bytearray, use_sets=False) -> None:
+            if isinstance(op, TACAssignOp):
+                if isinstance(op.lhs, mem.ConcreteVariable):
+                    op.lhs.def_block = self
+                elif isinstance(op.lhs, mem.Variable):
+                    for site in op.lhs.def_sites:
+                        site.block = self
+
+    def apply_operations(self, stack_values: defaultdict, frames: mem.CallFrames, use_sets=False) -> None:
         """
         Propagate and fold constants through the arithmetic TAC instructions in this block.
+
+        Storage values are recorded in stack_values, per contract address, and
+        memory contents in the memory of the current frame of frames. Blocks start
+        either when a new frame is entered or when a frame returns to its
+        caller, so the current frame is updated once, at the start of the block.
         """
+        if len(self.evm_ops) > 0:
+            first = self.evm_ops[0]
+            if first.pc == 0:
+                frames.enter(stack_values, first.call_number, first.call_depth)
+            else:
+                frames.resume(stack_values, first.call_depth, first.call_number)
+
         for op in self.tac_ops:
-            if op.opcode == opcodes.CONST:
-                op.lhs.values = op.args[0].value.values
+            opcode = op.opcode
+            if opcode is opcodes.CONST:
+                value = op.args[0].value.const_value
+                if value is not None and isinstance(op.lhs, mem.ConcreteVariable):
+                    op.lhs.const_value = value
+                else:
+                    op.lhs.values = op.args[0].value.values
+                op.value_source = VALUE_FROM_TRACE
+
+            elif opcode.flags & opcodes.ARITHMETIC:
+                fold_arithmetic(op, use_sets)
 
             # Special cases: they both belong to three_store_two.
             elif op.opcode == opcodes.CALLDATACOPY or op.opcode == opcodes.CODECOPY \
                 or op.opcode == opcodes.RETURNDATACOPY:
-                arg0 = remove_0x(str(op.args[0]))
-                destoffset = int(arg0, 16)
-                arg2 = remove_0x(str(op.args[2]))
-                length = int(arg2, 16)
-                value = op.value
-                memory[destoffset: destoffset + length] = value.to_bytes(length, byteorder='big')
+                destoffset = op.args[0].value.const_value
+                length = op.args[2].value.const_value
+                if destoffset is not None and length is not None:
+                    frames.memory.write_int(destoffset, length, op.value)
             elif op.opcode == opcodes.EXTCODECOPY:
-                arg1 = remove_0x(str(op.args[1]))
-                destoffset = int(arg1, 16)
-                arg3 = remove_0x(str(op.args[3]))
-                length = int(arg3, 16)
-                value = op.value
-                memory[destoffset: destoffset + length] = value.to_bytes(length, byteorder='big')
+                destoffset = op.args[1].value.const_value
+                length = op.args[3].value.const_value
+                if destoffset is not None and length is not None:
+                    frames.memory.write_int(destoffset, length, op.value)
+
+            # Calls are recorded once the called frame has returned: note the
+            # storage it used. A CALLCODE or DELEGATECALL runs with the
+            # storage of the caller
+            elif opcode is opcodes.CALL or opcode is opcodes.STATICCALL:
+                frames.call_returned(stack_values, op.args[1].value.const_value)
+            elif opcode is opcodes.CALLCODE or opcode is opcodes.DELEGATECALL:
+                frames.call_returned(stack_values, None, shared=True)
+            elif opcode is opcodes.CREATE or opcode is opcodes.CREATE2:
+                frames.call_returned(stack_values, op.lhs.const_value or None)
+            elif opcode is opcodes.ADDRESS:
+                frames.set_address(stack_values, op.lhs.const_value)
 
             # Special cases: cases for kind one and two, but those opcodes are not in three_store
             # Those opcodes have already had their value assigned to the lhs in the __handal_evm_op
-            elif op.opcode.is_kind_one() or op.opcode.is_kind_two():
+            elif op.opcode.flags & (opcodes.KIND_ONE | opcodes.KIND_TWO):
                 continue
 
             # Special cases: SLOAD and MLOAD get their value from the geth, and these values have been assigned
@@ -371,29 +499,22 @@ class TACBasicBlock(evm_efg.EVMBasicBlock):
                 continue
 
             # Special cases: SSTORE and MSTORE. Store variable values to the related storage and memory
+            # Storage slots are keyed by their value, or by the name of the
+            # variable holding them if it is unknown, and hold the stored
+            # value, or None if it is unknown
             elif op.opcode == opcodes.SSTORE:
-                var_name = "S[{}]".format(op.args[0])
-                var_value = op.args[1].value.values
-                stack_values[var_name] = var_value
-            elif op.opcode == opcodes.MSTORE:
-                arg0 = remove_0x(str(op.args[0]))
-                offset = int(arg0, 16)
-                arg1 = remove_0x(str(op.args[1]))
-                value = int(arg1, 16)
-                memory[offset: offset + 32] = value.to_bytes(32, byteorder='big')
-            elif op.opcode == opcodes.MSTORE8:
-                arg0 = remove_0x(str(op.args[0]))
-                offset = int(arg0, 16)
-                arg1 = remove_0x(str(op.args[1]))
-                value = int(arg1, 16)
-                memory[offset: offset + 1] = value.to_bytes(8, byteorder='big')
-
-            elif op.opcode.is_arithmetic():
-                if op.constant_args() or (op.constrained_args() and use_sets):
-                    rhs = [arg.value for arg in op.args] 
-                    op.lhs.values = mem.Variable.arith_op(op.opcode.name, rhs).values
-                elif not op.lhs.is_unconstrained:
-                    op.lhs.widen_to_top()
+                slot = op.args[0].value
+                key = slot.const_value if slot.is_const else slot.identifier
+                frames.store(stack_values, key, op.args[1].value.const_value)
+            elif op.opcode == opcodes.MSTORE or op.opcode == opcodes.MSTORE8:
+                # Memory contents can only be tracked at known offsets
+                offset = op.args[0].value.const_value
+                value = op.args[1].value.const_value
+                if offset is not None and value is not None:
+                    if op.opcode == opcodes.MSTORE:
+                        frames.memory.write_int(offset, 32, value)
+                    else:
+                        frames.memory.write_int(offset, 1, value & 0xFF)
 
 
 class TACOp(patterns.Visitable):
@@ -489,7 +610,8 @@ class TACAssignOp(TACOp):
     def __init__(self, lhs: mem.Variable, opcode: opcodes.OpCode,
                  args: t.List['TACArg'], pc: int, block=None,
                  print_name: bool = True, value_extra: int = None,
-                 loc: int = None, call_depth: int = None, call_number: int = None):
+                 loc: int = None, call_depth: int = None, call_number: int = None,
+                 value_source: str = None):
         """
         Args:
           lhs: The Variable that will receive the result of this operation.
@@ -499,6 +621,7 @@ class TACAssignOp(TACOp):
           loc: the position of the opcode
           call_depth: the depth of the called smart contracts
           call_number: the number of the called smart contracts so far
+          value_source: where the value of lhs came from, if it has one.
         """
         super().__init__(opcode, args, pc, block)
         self.lhs = lhs
@@ -508,6 +631,14 @@ class TACAssignOp(TACOp):
         self.call_depth = call_depth
         self.call_number = call_number
 
+        self.value_source = value_source
+        """
+        Where the value of lhs came from, set where the value is assigned:
+        VALUE_FROM_TRACE if it was recorded by geth (constants, environment
+        and call results, loads), VALUE_FOLDED if it was computed from the
+        arguments of an arithmetic op, or None if it has no known value.
+        """
+
     # Special case TAC expression
     # For example V4 = CALLVALUE to V4 = value content
     def __str__(self):
@@ -518,7 +649,7 @@ class TACAssignOp(TACOp):
                 rhs = "M[{}]".format(self.args[0])
 
             return "{}: {} = {}".format(hex(self.pc), self.lhs.identifier, rhs)
-        elif self.opcode.is_kind_one() or self.opcode.is_kind_two():
+        elif self.opcode.flags & (opcodes.KIND_ONE | opcodes.KIND_TWO):
             return "{}: {} = {}".format(hex(self.pc), self.lhs.identifier, self.lhs.values)
 
         arglist = ([str(self.opcode)] if self.print_name else []) \
@@ -535,7 +666,8 @@ class TACAssignOp(TACOp):
                             copy.deepcopy(self.args, memodict),
                             self.pc,
                             self.block,
-                            self.print_name)
+                            self.print_name,
+                            value_source=self.value_source)
         return new_op
 
     @staticmethod
@@ -623,10 +755,30 @@ class Destackifier:
     a block containing EVM instructions with no corresponding TAC code.
     """
 
-    def __init__(self):
+    VAR_PREFIX = "V"
+    """The prefix of the names of new variables, which are numbered from 0."""
+
+    CONST_CACHE_SIZE = 4096
+    """
+    The maximum number of distinct constants shared between the ops that use
+    them. When the cache is full, it is emptied and starts over.
+    """
+
+    def __init__(self, fold_constants: bool = False):
+        """
+        Args:
+          fold_constants: if True, constants are assigned and folded through
+                          arithmetic operations as the TAC is generated, so
+                          the TAC needs no apply_operations() pass.
+        """
+        self.fold_constants = fold_constants
+
         # A sequence of three-address operations
         self.ops = []
 
+        # Shared arguments holding constant values, keyed by value
+        self.const_args = {}
+
         # The symbolic variable stack we'll be operating on.
         self.stack = mem.VariableStack()
 
@@ -639,6 +791,11 @@ class Destackifier:
         # We increment it so that variable names will be globally unique.
         self.stack_vars = 0
 
+        # Build the opcode dispatch table the first time it is needed.
+        if Destackifier.__handlers is None:
+            Destackifier.__handlers = {code: Destackifier.__handler_for(opcode)
+                                       for code, opcode in opcodes.BYTECODES.items()}
+
     def __fresh_init(self, evm_block: evm_efg.EVMBasicBlock) -> None:
         """Reinitialise all structures in preparation for converting a block."""
         self.ops = []
@@ -646,15 +803,24 @@ class Destackifier:
         self.block_entry = evm_block.evm_ops[0].pc \
             if len(evm_block.evm_ops) > 0 else None
 
-    def __new_var(self) -> mem.Variable:
-        """Construct and return a new variable with the next free identifier."""
+
+    def __new_var(self, pc: int = None) -> mem.ConcreteVariable:
+        """
+        Construct and return a new variable with the next free identifier,
+        defined at the given pc (by default, the entry of the current block).
+        Its value is Top until constants are folded into it.
+        """
 
         # Generate the new variable, numbering it by the implicit stack location
         # it came from.
-        var = mem.Variable.top(name="V{}".format(self.stack_vars),
-                               def_sites=ssle([TACLocRef(None, self.block_entry)]))
+        return mem.ConcreteVariable(name=self.__new_var_name(),
+                                    def_pc=self.block_entry if pc is None else pc)
+
+    def __new_var_name(self) -> str:
+        """Reserve the next free variable identifier and return it."""
+        name = "{}{}".format(self.VAR_PREFIX, self.stack_vars)
         self.stack_vars += 1
-        return var
+        return name
 
 
     # Add the last block's stack into the following one
@@ -667,7 +833,7 @@ class Destackifier:
             first_opcode = evm_block.evm_ops[0]
             if first_opcode.pc == 0:
                 pre_stack = mem.VariableStack(call_depth=first_opcode.call_depth)
-            elif first_opcode.opcode.is_kind_four() or first_opcode.opcode.is_kind_five():
+            elif first_opcode.opcode.flags & (opcodes.KIND_FOUR | opcodes.KIND_FIVE):
                 pre_stack = stacks.pop()
                 if first_opcode.call_depth != pre_stack.call_depth:
                     pre_stack = stacks.pop()
@@ -675,8 +841,12 @@ class Destackifier:
         self.__fresh_init(evm_block)
 
         self.stack = pre_stack
+        handlers = self.__handlers
         for op in evm_block.evm_ops:
-            self.__handle_evm_op(op)
+            handler = handlers.get(op.opcode.code)
+            if handler is None:
+                handler = Destackifier.__gen_missing
+            handler(self, op)
 
         entry = evm_block.evm_ops[0].pc if len(evm_block.evm_ops) > 0 else None
         exit = evm_block.evm_ops[-1].pc + evm_block.evm_ops[-1].opcode.push_len() \
@@ -698,114 +868,71 @@ class Destackifier:
             last_opcode = evm_block.evm_ops[len(evm_block.evm_ops) - 1]
             if first_opcode.pc == 0 and not last_opcode.opcode.possibly_halts():
                 stacks.append(self.stack)
-            if (first_opcode.opcode.is_kind_four() or first_opcode.opcode.is_kind_five())\
+            if first_opcode.opcode.flags & (opcodes.KIND_FOUR | opcodes.KIND_FIVE) \
                 and not last_opcode.opcode.possibly_halts():
                 stacks.append(self.stack)
 
         return new_block
 
-    def __handle_evm_op(self, op: evm_efg.EVMOp) -> None:
-        """
-        Produce from an EVM line its corresponding TAC instruction, if there is one,
-        appending it to the current TAC sequence.
-        """
-        if op.opcode.is_swap():
-            self.stack.swap(op.opcode.pop)
-        elif op.opcode.is_dup():
-            self.stack.dup(op.opcode.pop)
-        elif op.opcode == opcodes.POP:
-            self.stack.pop()
-        else:
-            # When generating TAC operation from evm opcode, making use of value and value_extra generated from geth
-            self.__gen_instruction(op)
-
-    # Use values from geth
-    def __gen_instruction(self, op: evm_efg.EVMOp) -> None:
-        """
-        Given a line, generate its corresponding TAC operation,
-        append it to the op sequence, and push any generated
-        variables to the stack.
-        """
-        inst = None
-        new_var = self.__new_var() if op.opcode.push == 1 else None
+    # Each EVM op is converted by the handler for its opcode, which is looked up
+    # by opcode byte in __handlers. Ops whose opcode is missing from the table
+    # (i.e. opcodes.missing_opcode()) go to __gen_missing.
+    __handlers = None
 
-        # Set this variable's def site
-        if new_var is not None:
-            for site in new_var.def_sites:
-                site.pc = op.pc
+    @staticmethod
+    def __handler_for(opcode: opcodes.OpCode):
+        """Return the method that converts EVM ops with the given opcode."""
+        if opcode.is_swap():
+            return Destackifier.__swap
+        elif opcode.is_dup():
+            return Destackifier.__dup
+        elif opcode == opcodes.POP:
+            return Destackifier.__pop
 
         # Generate the appropriate TAC operation.
         # Special cases first, followed by the fallback to generic instructions.
-        # Although the opcode is PUSH, vandal still marks it as CONST to do arithemetic operations.
-        if op.opcode.is_push():
-            args = [TACArg(var=mem.Variable(values=[op.value], name="C"))]
-            inst = TACAssignOp(new_var, opcodes.CONST, args, op.pc, print_name=False)
-        elif op.opcode.is_missing():
-            args = [TACArg(var=mem.Variable(values=[op.value], name="C"))]
-            inst = TACOp(op.opcode, args, op.pc)
-        elif op.opcode.is_log():
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACOp(opcodes.LOG, args, op.pc)
-        elif op.opcode == opcodes.MSTORE:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(opcodes.MSTORE.pop)]
-            inst = TACOp(op.opcode, args, op.pc)
-        elif op.opcode == opcodes.MSTORE8:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(opcodes.MSTORE8.pop)]
-            inst = TACOp(op.opcode, args, op.pc)
-
-        # SLOAD is same as MLOAD, they both hasve value in the tempt file
-        # We will assign the real value to the storage variable
-        elif op.opcode == opcodes.SLOAD or op.opcode == opcodes.MLOAD:
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(self.stack.pop())]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc)
-        elif op.opcode == opcodes.SSTORE:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(opcodes.SSTORE.pop)]
-            inst = TACOp(op.opcode, args, op.pc)
-
-        # Special cases for kind one, such as CALLVALUE
-        # For kind one, there are no arguments for the previous vandal, so the inst will be incomplete
-        # For example, 0xa CALLVALUE 0x0 will be transalated into V4 =
-        # Now we assign the real value to this opcode and keep its opcode
-        elif op.opcode.is_kind_one():
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = []
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, print_name=False)
-
-        # Special cases for kind two, such as CALLDATALOAD
-        # Args have all the stack arguments, those information (stack arguments) are useless
-        # Since we just get the values from geth, not using them.
-        elif op.opcode.is_kind_two():
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, print_name=False)
-
-        # Special cases for kind three store two, such as CALLDATACOPY
-        # There are multiple arguments in this kind of opcodes
-        elif op.opcode.is_kind_three_store_two():
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACOp(op.opcode, args, op.pc, None, op.value)
-
-        # Special cases for kind four, such as call
-        # Field value_extra is the memory content
-        elif op.opcode.is_kind_four():
-            # op.value is success flag, value_extra is the memory content.
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, None, True, op.value_extra)
-
-        elif op.opcode.is_kind_five():
-            new_var = mem.Variable(values=[op.value], name=new_var.name)
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc, None, True, None)
-
-        elif new_var is not None:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACAssignOp(new_var, op.opcode, args, op.pc)
+        elif opcode.is_push():
+            return Destackifier.__gen_push
+        elif opcode.is_missing():
+            return Destackifier.__gen_missing
+        elif opcode.is_log():
+            return Destackifier.__gen_log
+        elif opcode in (opcodes.MSTORE, opcodes.MSTORE8, opcodes.SSTORE):
+            return Destackifier.__gen_store
+        elif opcode in (opcodes.SLOAD, opcodes.MLOAD):
+            return Destackifier.__gen_load
+        elif opcode.is_kind_one():
+            return Destackifier.__gen_kind_one
+        elif opcode.is_kind_two():
+            return Destackifier.__gen_kind_two
+        elif opcode.is_kind_three_store_two():
+            return Destackifier.__gen_kind_three_store_two
+        elif opcode.is_kind_four():
+            return Destackifier.__gen_kind_four
+        elif opcode.is_kind_five():
+            return Destackifier.__gen_kind_five
+        elif opcode.is_arithmetic():
+            return Destackifier.__gen_arith
+        elif opcode.push == 1:
+            return Destackifier.__gen_assign
         else:
-            args = [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
-            inst = TACOp(op.opcode, args, op.pc)
+            return Destackifier.__gen_op
+
+    def __swap(self, op: evm_efg.EVMOp) -> None:
+        self.stack.swap(op.opcode.pop)
+
+    def __dup(self, op: evm_efg.EVMOp) -> None:
+        self.stack.dup(op.opcode.pop)
+
+    def __pop(self, op: evm_efg.EVMOp) -> None:
+        self.stack.pop()
 
+    # When generating TAC operation from evm opcode, making use of value and value_extra generated from geth
+    def __emit(self, op: evm_efg.EVMOp, inst: TACOp, new_var: mem.Variable = None) -> None:
+        """
+        Append a generated TAC operation to the op sequence, and push the
+        variable it defines, if any, to the stack.
+        """
         # This var must only be pushed after the operation is performed.
         if new_var is not None:
             self.stack.push(new_var)
@@ -815,3 +942,104 @@ class Destackifier:
         inst.call_number = op.call_number
 
         self.ops.append(inst)
+
+    def __emit_traced(self, op: evm_efg.EVMOp, inst: 'TACAssignOp') -> None:
+        """
+        Emit an op whose lhs is a ConcreteVariable holding the value geth
+        recorded for op, and push that variable.
+        """
+        if op.value is not None:
+            inst.value_source = VALUE_FROM_TRACE
+        self.__emit(op, inst, inst.lhs)
+
+    def __const_arg(self, value: int) -> TACArg:
+        """Return the shared argument holding the given constant."""
+        arg = self.const_args.get(value)
+        if arg is None:
+            if len(self.const_args) >= self.CONST_CACHE_SIZE:
+                self.const_args.clear()
+            arg = TACArg(var=mem.ConstantVariable(value, "C"))
+            self.const_args[value] = arg
+        return arg
+
+    def __pop_args(self, op: evm_efg.EVMOp) -> t.List[TACArg]:
+        """Pop the stack arguments of the given op."""
+        return [TACArg.from_var(var) for var in self.stack.pop_many(op.opcode.pop)]
+
+    # Although the opcode is PUSH, vandal still marks it as CONST to do arithemetic operations.
+    def __gen_push(self, op: evm_efg.EVMOp) -> None:
+        new_var = self.__new_var(op.pc)
+        args = [self.__const_arg(op.value)]
+        inst = TACAssignOp(new_var, opcodes.CONST, args, op.pc, print_name=False)
+        if self.fold_constants:
+            new_var.const_value = args[0].var.const_value
+            inst.value_source = VALUE_FROM_TRACE
+        self.__emit(op, inst, new_var)
+
+    def __gen_missing(self, op: evm_efg.EVMOp) -> None:
+        args = [self.__const_arg(op.value)]
+        self.__emit(op, TACOp(op.opcode, args, op.pc))
+
+    def __gen_log(self, op: evm_efg.EVMOp) -> None:
+        self.__emit(op, TACOp(opcodes.LOG, self.__pop_args(op), op.pc))
+
+    # MSTORE, MSTORE8 and SSTORE
+    def __gen_store(self, op: evm_efg.EVMOp) -> None:
+        self.__emit(op, TACOp(op.opcode, self.__pop_args(op), op.pc))
+
+    # SLOAD is same as MLOAD, they both hasve value in the tempt file
+    # We will assign the real value to the storage variable
+    def __gen_load(self, op: evm_efg.EVMOp) -> None:
+        new_var = mem.ConcreteVariable(op.value, self.__new_var_name())
+        args = [TACArg.from_var(self.stack.pop())]
+        self.__emit_traced(op, TACAssignOp(new_var, op.opcode, args, op.pc))
+
+    # Special cases for kind one, such as CALLVALUE
+    # For kind one, there are no arguments for the previous vandal, so the inst will be incomplete
+    # For example, 0xa CALLVALUE 0x0 will be transalated into V4 =
+    # Now we assign the real value to this opcode and keep its opcode
+    def __gen_kind_one(self, op: evm_efg.EVMOp) -> None:
+        new_var = mem.ConcreteVariable(op.value, self.__new_var_name())
+        self.__emit_traced(op, TACAssignOp(new_var, op.opcode, [], op.pc, print_name=False))
+
+    # Special cases for kind two, such as CALLDATALOAD
+    # Args have all the stack arguments, those information (stack arguments) are useless
+    # Since we just get the values from geth, not using them.
+    def __gen_kind_two(self, op: evm_efg.EVMOp) -> None:
+        new_var = mem.ConcreteVariable(op.value, self.__new_var_name())
+        args = self.__pop_args(op)
+        self.__emit_traced(op, TACAssignOp(new_var, op.opcode, args, op.pc, print_name=False))
+
+    # Special cases for kind three store two, such as CALLDATACOPY
+    # There are multiple arguments in this kind of opcodes
+    def __gen_kind_three_store_two(self, op: evm_efg.EVMOp) -> None:
+        self.__emit(op, TACOp(op.opcode, self.__pop_args(op), op.pc, None, op.value))
+
+    # Special cases for kind four, such as call
+    # Field value_extra is the memory content
+    def __gen_kind_four(self, op: evm_efg.EVMOp) -> None:
+        # op.value is success flag, value_extra is the memory content.
+        new_var = mem.ConcreteVariable(op.value, self.__new_var_name())
+        args = self.__pop_args(op)
+        self.__emit_traced(op, TACAssignOp(new_var, op.opcode, args, op.pc, None, True,
+                                           op.value_extra))
+
+    def __gen_kind_five(self, op: evm_efg.EVMOp) -> None:
+        new_var = mem.ConcreteVariable(op.value, self.__new_var_name())
+        args = self.__pop_args(op)
+        self.__emit_traced(op, TACAssignOp(new_var, op.opcode, args, op.pc, None, True, None))
+
+    def __gen_arith(self, op: evm_efg.EVMOp) -> None:
+        new_var = self.__new_var(op.pc)
+        inst = TACAssignOp(new_var, op.opcode, self.__pop_args(op), op.pc)
+        if self.fold_constants:
+            fold_arithmetic(inst)
+        self.__emit(op, inst, new_var)
+
+    def __gen_assign(self, op: evm_efg.EVMOp) -> None:
+        new_var = self.__new_var(op.pc)
+        args = self.__pop_args(op)
+        self.__emit(op, TACAssignOp(new_var, op.opcode, args, op.pc), new_var)
+
+    def __gen_op(self, op: evm_efg.EVMOp) -> None:
+        self.__emit(op, TACOp(op.opcode, self.__pop_args(op), op.pc))
@@ -0,0 +1,93 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""tracedb.py: read transaction traces from the revised geth's MongoDB database."""
+
+import typing as t
+
+DEFAULT_URI = "mongodb://localhost:27017"
+"""The MongoDB instance the revised geth writes to by default."""
+DATABASE = "geth"
+"""The database in which the revised geth stores transactions."""
+COLLECTION = "transaction"
+"""The collection holding one Transac document per transaction."""
+
+HASH_FIELD = "tx_hash"
+"""The document key of Transac.Tx_Hash, as lower-cased by mgo."""
+TRACE_FIELD = "tx_trace"
+"""The document key of Transac.Tx_Trace, as lower-cased by mgo."""
+TRACE_SEP = "|"
+"""The separator between steps in Tx_Trace."""
+
+
+def connect(uri: str = DEFAULT_URI, database: str = DATABASE,
+            collection: str = COLLECTION):
+    """
+    Return the MongoDB collection holding the transactions recorded by geth.
+
+    Requires pymongo.
+    """
+    import pymongo
+
+    return pymongo.MongoClient(uri)[database][collection]
+
+
+def split_trace(trace: str) -> t.Generator[str, None, None]:
+    """
+    Split a Tx_Trace string into trace lines of the form <PC; OPCODE NAME; ARGS>,
+    as accepted by evm_efg.ops_from_trace(), without building a list of them.
+    """
+    start = 0
+    while True:
+        end = trace.find(TRACE_SEP, start)
+        if end < 0:
+            yield trace[start:]
+            return
+        yield trace[start:end]
+        start = end + 1
+
+
+def find_transactions(collection, query: dict = None, batch_size: int = 100) \
+    -> t.Generator[t.Tuple[str, str], None, None]:
+    """
+    Retrieve the traces of the transactions in the given collection.
+
+    Args:
+      collection: a pymongo Collection, or any object providing the same
+                  find() method, such as a mock.
+      query: a filter selecting the transactions to read, all by default.
+      batch_size: the number of documents fetched per round trip.
+
+    Returns:
+      A generator of (transaction hash, Tx_Trace) pairs, in cursor order.
+    """
+    projection = {HASH_FIELD: True, TRACE_FIELD: True}
+    cursor = collection.find(query or {}, projection).batch_size(batch_size)
+    for doc in cursor:
+        yield doc.get(HASH_FIELD) or str(doc["_id"]), doc.get(TRACE_FIELD) or ""
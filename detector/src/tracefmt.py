@@ -0,0 +1,191 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""tracefmt.py: readers for geth transaction trace files, and a compact
+binary encoding of traces.
+
+A binary trace is the MAGIC header followed by one record per step:
+  - the opcode byte and (pc << 2 | n) as a little-endian uint32,
+    where n is the number of values recorded for the step (0 to 2);
+  - each value as a length byte followed by that many big-endian bytes,
+    or for values longer than 254 bytes, 0xFF followed by the length as a
+    little-endian uint32. Zero has length 0.
+"""
+
+import io
+import mmap
+import struct
+import typing as t
+
+import src.evm_efg as evm_efg
+import src.opcodes as opcodes
+
+MAGIC = b"TXSPTRC\x01"
+"""The header identifying a binary trace, ending in the format version."""
+
+_RECORD = struct.Struct("<BI")
+_LONG_LENGTH = struct.Struct("<I")
+_LONG = 0xFF
+
+def is_binary(header: bytes) -> bool:
+    """True iff the given leading bytes of a trace are a binary trace header."""
+    return header[:len(MAGIC)] == MAGIC
+
+
+def write_ops(ops: t.Iterable[evm_efg.EVMOp], f: t.BinaryIO) -> None:
+    """
+    Write the given EVMOps to a file opened in binary mode.
+
+    Throws:
+      ValueError: if an op has a negative value or pc, or its opcode is
+                  not an EVM instruction.
+    """
+    f.write(MAGIC)
+    for op in ops:
+        values = [v for v in (op.value, op.value_extra) if v is not None]
+        if not 0 <= op.opcode.code <= 0xFF or not 0 <= op.pc < 1 << 30 \
+            or any(v < 0 for v in values):
+            raise ValueError("Cannot encode {!r}.".format(op))
+
+        record = bytearray(_RECORD.pack(op.opcode.code, op.pc << 2 | len(values)))
+        for v in values:
+            data = v.to_bytes((v.bit_length() + 7) // 8, byteorder='big')
+            if len(data) < _LONG:
+                record.append(len(data))
+            else:
+                record.append(_LONG)
+                record += _LONG_LENGTH.pack(len(data))
+            record += data
+        f.write(record)
+
+
+def ops_from_binary(data: bytes) -> t.Generator[evm_efg.EVMOp, None, None]:
+    """
+    Decode a binary trace into EVMOps, without copying the input.
+
+    Args:
+      data: the contents of a binary trace, or any object supporting the
+            buffer protocol, such as an mmap.
+
+    Throws:
+      ValueError: if data is not a binary trace.
+      LookupError: if a record has an unknown opcode.
+    """
+    with memoryview(data) as buf:
+        if not is_binary(buf[:len(MAGIC)].tobytes()):
+            raise ValueError("Not a binary trace.")
+        yield from _decode_records(buf)
+
+
+def _decode_records(buf: memoryview) -> t.Generator[evm_efg.EVMOp, None, None]:
+    """Decode the records of a binary trace, following its header."""
+
+    unpack_record = _RECORD.unpack_from
+    by_value = opcodes.BYTECODES
+    record_size = _RECORD.size
+    pos, end = len(MAGIC), len(buf)
+    while pos < end:
+        code, word = unpack_record(buf, pos)
+        pos += record_size
+
+        values = word & 3
+        value = value_extra = None
+        if values:
+            value, pos = _read_value(buf, pos)
+            if values == 2:
+                value_extra, pos = _read_value(buf, pos)
+
+        if code not in by_value:
+            raise LookupError("No opcode with value '0x{:02X}'.".format(code))
+        yield evm_efg.EVMOp(word >> 2, by_value[code], value, value_extra)
+
+
+def _read_value(buf: memoryview, pos: int) -> t.Tuple[int, int]:
+    """Decode the value at pos, returning it and the position after it."""
+    n = buf[pos]
+    pos += 1
+    if n == _LONG:
+        n = _LONG_LENGTH.unpack_from(buf, pos)[0]
+        pos += _LONG_LENGTH.size
+    return int.from_bytes(buf[pos:pos + n], 'big'), pos + n
+
+
+def format_ops(ops: t.Iterable[evm_efg.EVMOp]) -> t.Generator[str, None, None]:
+    """
+    Format EVMOps as text trace lines, as read by evm_efg.ops_from_trace().
+    """
+    for op in ops:
+        if op.value is None:
+            args = ""
+        elif op.value_extra is None:
+            args = str(op.value)
+        else:
+            args = "{},{}".format(op.value, op.value_extra)
+        yield "{};{};{}\n".format(op.pc, op.opcode.name, args)
+
+
+def ops_from_text(f: t.BinaryIO) -> t.Generator[evm_efg.EVMOp, None, None]:
+    """
+    Parse a text trace into EVMOps with evm_efg.ops_from_trace(), reading it
+    as bytes so that no line is ever decoded into a str.
+
+    Args:
+      f: an mmap or binary file holding a text trace. Only readline() is used.
+    """
+    return evm_efg.ops_from_trace(iter(f.readline, b""))
+
+
+def read_ops(f: t.BinaryIO) -> t.Generator[evm_efg.EVMOp, None, None]:
+    """
+    Read the EVMOps of a text or binary trace from a file opened in binary
+    mode, telling the formats apart by the binary header.
+
+    Regular files are memory-mapped and scanned in place, so the file is
+    never copied into Python objects in bulk. Other files, such as pipes
+    and in-memory files, are read line by line if they hold a text trace,
+    or whole if they hold a binary trace.
+    """
+    try:
+        data = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+    except (OSError, ValueError, io.UnsupportedOperation):
+        # Pipes, in-memory files and empty files cannot be mapped; the
+        # header is peeked at, which needs a buffered file
+        if not hasattr(f, "peek"):
+            f = io.BufferedReader(f)
+        if is_binary(f.peek(len(MAGIC))):
+            yield from ops_from_binary(f.read())
+        else:
+            yield from ops_from_text(f)
+        return
+
+    with data:
+        if is_binary(data[:len(MAGIC)]):
+            yield from ops_from_binary(data)
+        else:
+            yield from ops_from_text(data)
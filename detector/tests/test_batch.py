@@ -0,0 +1,81 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""test_batch.py: analyze batches of trace files."""
+
+import os
+import shutil
+import subprocess
+import sys
+
+import pytest
+
+import src.batch as batch
+
+DETECTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+EXAMPLE_TRACE = os.path.join(DETECTOR_DIR, "..", "example",
+                             "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b.txt")
+
+
+@pytest.fixture
+def same_name_traces(tmp_path):
+    """Write a manifest of two copies of the example trace named tx.txt."""
+    manifest = tmp_path / "traces.txt"
+    for subdir in ["a", "b"]:
+        os.makedirs(str(tmp_path / subdir))
+        shutil.copy(EXAMPLE_TRACE, str(tmp_path / subdir / "tx.txt"))
+    manifest.write_text("a/tx.txt\nb/tx.txt\n")
+    return str(manifest)
+
+
+def test_check_trace_names():
+    batch.check_trace_names(["a/tx1.txt", "a/tx2.txt", "b/tx3"])
+    with pytest.raises(ValueError, match="both named 'tx1'"):
+        batch.check_trace_names(["a/tx1.txt", "a/tx2.txt", "b/tx1.bin"])
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_same_names_rejected(tmp_path, same_name_traces, jobs):
+    facts_dir = str(tmp_path / "facts")
+    paths = batch.find_traces(same_name_traces)
+
+    with pytest.raises(ValueError, match="both named 'tx'"):
+        list(batch.analyze_batch(paths, facts_dir, jobs=jobs))
+    assert not os.path.exists(facts_dir)
+
+
+def test_same_names_rejected_by_decompile_geth(tmp_path, same_name_traces):
+    facts_dir = str(tmp_path / "facts")
+    result = subprocess.run(
+        [sys.executable, os.path.join(DETECTOR_DIR, "bin", "decompile_geth"),
+         "-n", "-b", same_name_traces, "-t", facts_dir],
+        stdout=subprocess.PIPE, stderr=subprocess.PIPE, universal_newlines=True)
+
+    assert result.returncode == 2
+    assert "both named 'tx'" in result.stderr
+    assert not os.path.exists(facts_dir)
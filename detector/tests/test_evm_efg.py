@@ -0,0 +1,74 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""test_evm_efg.py: split traces into EVMBasicBlocks."""
+
+import pytest
+
+import src.evm_efg as evm_efg
+import src.opcodes as opcodes
+
+
+def call_trace():
+    """Return the EVMOps of a trace that makes a call, and the pcs of its blocks."""
+    ops = [evm_efg.EVMOp(0, opcodes.PUSH1, 1),
+           evm_efg.EVMOp(2, opcodes.GAS, 0),
+           evm_efg.EVMOp(0, opcodes.PUSH1, 0),
+           evm_efg.EVMOp(2, opcodes.STOP),
+           evm_efg.EVMOp(3, opcodes.CALL, 1, 0),
+           evm_efg.EVMOp(4, opcodes.THROW)]
+    return ops, [[0, 2], [0, 2], [3, 4]]
+
+
+def test_blocks_hold_the_ops():
+    ops, pcs = call_trace()
+
+    blocks = evm_efg.blocks_from_ops(iter(ops))
+
+    assert [[op.pc for op in block.evm_ops] for block in blocks] == pcs
+    assert [op for block in blocks for op in block.evm_ops] == ops
+    assert all(op.block is block for block in blocks for op in block.evm_ops)
+    assert [op.call_depth for op in ops] == [1, 1, 2, 2, 1, 1]
+    assert [(block.entry, block.exit) for block in blocks] == [(0, 1), (2, 3), (4, 5)]
+
+
+def test_blocks_from_block_ops():
+    ops, pcs = call_trace()
+    blocks = evm_efg.blocks_from_ops(ops)
+
+    # The ops of existing blocks can be split again, and move to the new blocks
+    rebuilt = evm_efg.blocks_from_ops(op for block in blocks for op in block.evm_ops)
+
+    assert [[op.pc for op in block.evm_ops] for block in rebuilt] == pcs
+    assert all(op.block is block for block in rebuilt for op in block.evm_ops)
+
+
+def test_ops_have_slots():
+    op = evm_efg.EVMOp(0, opcodes.STOP)
+    with pytest.raises(AttributeError):
+        op.extra = None
@@ -0,0 +1,208 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""test_exporter.py: compare the fact formats written by the exporters."""
+
+import io
+import os
+import shutil
+import subprocess
+import sys
+import tarfile
+
+import pytest
+
+import src.exporter as exporter
+import src.tac_efg as tac_efg
+
+DETECTOR_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..")
+EXAMPLE_TRACE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "example",
+    "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b.txt")
+OPCODES = ["CALL", "CALLER", "SSTORE", "SLOAD", "JUMPI", "TIMESTAMP", "SELFDESTRUCT"]
+# Relations whose rows do not have the arity of a single EVM opcode
+UNEVEN_OPCODES = ["LOG", "CONST"]
+
+
+@pytest.fixture(scope="module")
+def efg():
+    with open(EXAMPLE_TRACE) as f:
+        return tac_efg.TACGraph.from_opcode(f)
+
+
+def read_tsv(path):
+    with open(path) as f:
+        return f.read().splitlines()
+
+
+@pytest.mark.parametrize("opcodes", [OPCODES, UNEVEN_OPCODES])
+def test_sqlite_round_trip(tmp_path, efg, opcodes):
+    tsv_dir = str(tmp_path / "facts")
+    db_path = str(tmp_path / "facts.db")
+    exporter.EFGTsvExporter(efg).export(output_dir=tsv_dir, out_opcodes=opcodes)
+    exporter.EFGSqliteExporter(efg).export(db_path=db_path, out_opcodes=opcodes)
+
+    tables = exporter.read_sqlite_facts(db_path)
+
+    assert sorted(name + ".facts" for name in tables) == sorted(os.listdir(tsv_dir))
+    for name, rows in tables.items():
+        lines = read_tsv(os.path.join(tsv_dir, name + ".facts"))
+        assert ["\t".join(str(field) for field in row) for row in rows] == lines, name
+
+
+@pytest.mark.parametrize("opcode", UNEVEN_OPCODES)
+def test_uneven_rows(tmp_path, efg, opcode):
+    exporter.EFGTsvExporter(efg).export(output_dir=str(tmp_path), out_opcodes=[opcode])
+
+    lines = read_tsv(str(tmp_path / ("op_" + opcode + ".facts")))
+    ops = [op for op in efg.tac_ops if op.opcode.name == opcode]
+    arities = [1 + len(op.args) + op.has_lhs() + 3 for op in ops]
+
+    assert [len(line.split("\t")) for line in lines] == arities
+    assert [int(line.split("\t")[0]) for line in lines] == [op.pc for op in ops]
+    assert max(arities) <= exporter.op_arity(opcode)
+    if opcode == "LOG":
+        assert len(set(arities)) > 1
+
+
+def read_dir(path):
+    return {name: read_tsv(os.path.join(path, name)) for name in os.listdir(path)}
+
+
+@pytest.fixture(scope="module")
+def small_efg():
+    return tac_efg.TACGraph.from_opcode(
+        ["0;PUSH1;1", "2;CALLER;5", "3;SSTORE;", "4;PUSH1;0", "6;SLOAD;0", "7;STOP;"])
+
+
+def test_tx_store(tmp_path, efg, small_efg):
+    store_dir = str(tmp_path / "store")
+    expected = {"tx.facts": ["0xa", "tx%s"]}
+    for tx_id, graph in [("0xa", efg), ("tx%s", small_efg)]:
+        tsv_dir = str(tmp_path / tx_id)
+        exporter.EFGTsvExporter(graph).export(output_dir=tsv_dir, out_opcodes=OPCODES)
+        exporter.EFGTxStoreExporter(graph, tx_id).export(store_dir=store_dir,
+                                                         out_opcodes=OPCODES)
+        for name, lines in read_dir(tsv_dir).items():
+            expected.setdefault(name, []).extend(tx_id + "\t" + line for line in lines)
+
+    # Each relation keeps its own file, with the rows of both transactions
+    assert read_dir(store_dir) == expected
+    assert len(expected["op_SSTORE.facts"]) == 1 + len(
+        [op for op in efg.tac_ops if op.opcode.name == "SSTORE"])
+
+
+def test_tx_store_matches_append_facts(tmp_path, efg):
+    exporter.EFGTsvExporter(efg).export(output_dir=str(tmp_path / "facts"),
+                                        out_opcodes=OPCODES)
+    for tx_id in ["0xa", "0xb"]:
+        exporter.EFGTxStoreExporter(efg, tx_id).export(store_dir=str(tmp_path / "store"),
+                                                       out_opcodes=OPCODES)
+        exporter.append_facts(str(tmp_path / "facts"), str(tmp_path / "appended"), tx_id)
+    assert read_dir(str(tmp_path / "store")) == read_dir(str(tmp_path / "appended"))
+
+
+def test_tx_store_relations(tmp_path, efg):
+    store_dir = str(tmp_path / "store")
+    exporter.EFGTxStoreExporter(efg, "0xa").export(
+        store_dir=store_dir, out_opcodes=OPCODES, relations={"op_CALL"})
+    facts = read_dir(store_dir)
+    assert len(facts.pop("op_CALL.facts")) > 0
+    assert facts.pop("tx.facts") == ["0xa"]
+    assert all(lines == [] for lines in facts.values())
+
+
+@pytest.mark.parametrize("tx_id", ["", "0x\ta", "0xa\n"])
+def test_invalid_tx_id(efg, tx_id):
+    with pytest.raises(ValueError):
+        exporter.EFGTxStoreExporter(efg, tx_id)
+
+
+@pytest.mark.parametrize("compression", sorted(exporter.EFGArchiveExporter.COMPRESSIONS))
+def test_archive(tmp_path, efg, compression):
+    tsv_dir = str(tmp_path / "facts")
+    exporter.EFGTsvExporter(efg).export(output_dir=tsv_dir, out_opcodes=OPCODES)
+    archive_path = exporter.fact_archive_path(tsv_dir, compression)
+    assert archive_path == tsv_dir + ".tar." + compression
+    exporter.EFGArchiveExporter(efg).export(archive_path=archive_path,
+                                            out_opcodes=OPCODES, compression=compression)
+
+    with tarfile.open(archive_path, "r:" + compression) as tar:
+        assert sorted(tar.getnames()) == sorted(os.listdir(tsv_dir))
+
+    extracted = exporter.extract_facts(archive_path, str(tmp_path / "extracted"))
+    assert read_dir(extracted) == read_dir(tsv_dir)
+
+    # bin/extract_facts prints the directory it extracted to, a new one by default
+    result = subprocess.run(
+        [sys.executable, os.path.join(DETECTOR_DIR, "bin", "extract_facts"), archive_path],
+        stdout=subprocess.PIPE, universal_newlines=True, check=True)
+    extracted = result.stdout.strip()
+    try:
+        assert read_dir(extracted) == read_dir(tsv_dir)
+    finally:
+        shutil.rmtree(extracted)
+
+
+def decompile_geth(*args):
+    subprocess.run([sys.executable, os.path.join(DETECTOR_DIR, "bin", "decompile_geth"),
+                    "-n"] + list(args) + ["-o"] + OPCODES + ["--", EXAMPLE_TRACE], check=True)
+
+
+def test_compress_cli(tmp_path):
+    tsv_dir = str(tmp_path / "tsv")
+    decompile_geth("-t", tsv_dir)
+    decompile_geth("-t", str(tmp_path / "facts"), "-z", "xz")
+    assert not os.path.exists(str(tmp_path / "facts"))
+
+    subprocess.run([sys.executable, os.path.join(DETECTOR_DIR, "bin", "extract_facts"),
+                    str(tmp_path / "facts.tar.xz"), str(tmp_path / "extracted")],
+                   stdout=subprocess.PIPE, check=True)
+    assert read_dir(str(tmp_path / "extracted")) == read_dir(tsv_dir)
+
+
+def test_archive_relations(tmp_path, efg):
+    archive_path = str(tmp_path / "facts.tar.gz")
+    exporter.EFGArchiveExporter(efg).export(archive_path=archive_path,
+                                            out_opcodes=OPCODES, relations={"op_CALL"})
+    facts = read_dir(exporter.extract_facts(archive_path, str(tmp_path / "facts")))
+    assert len(facts.pop("op_CALL.facts")) > 0
+    assert all(lines == [] for lines in facts.values())
+
+
+@pytest.mark.parametrize("name", ["../op_CALL.facts", "sub/op_CALL.facts", ".hidden"])
+def test_extract_rejects_members(tmp_path, name):
+    archive_path = str(tmp_path / "facts.tar.gz")
+    with tarfile.open(archive_path, "w:gz") as tar:
+        info = tarfile.TarInfo(name)
+        info.size = 3
+        tar.addfile(info, io.BytesIO(b"1\t2"))
+    with pytest.raises(ValueError):
+        exporter.extract_facts(archive_path, str(tmp_path / "facts"))
+    assert not os.path.exists(str(tmp_path / "op_CALL.facts"))
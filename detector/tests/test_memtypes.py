@@ -0,0 +1,254 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""test_memtypes.py: paged memory and call frames."""
+
+import random
+from collections import defaultdict
+
+import pytest
+
+import src.memtypes as mem
+import src.opcodes as opcodes
+import src.tac_efg as tac_efg
+
+PAGE = mem.PagedMemory.PAGE_SIZE
+
+# The outer frame stores 7 in slot 1 before its address is known, calls
+# 0xaa, which stores 5 in slot 2, then delegates to 0xbb, which stores 9 in
+# slot 3 of the caller, and finally reads its own address, 0xcc. geth
+# records each call once its callee has returned
+CALL_TRACE = [
+    "0;PUSH1;7", "2;PUSH1;1", "4;SSTORE;",
+    "5;PUSH1;0", "7;PUSH1;0", "9;PUSH1;0", "11;PUSH1;0", "13;PUSH1;0",
+    "15;PUSH1;170", "17;PUSH1;0",
+    "0;PUSH1;5", "2;PUSH1;2", "4;SSTORE;", "5;STOP;",
+    "19;CALL;1",
+    "20;PUSH1;0", "22;PUSH1;0", "24;PUSH1;0", "26;PUSH1;0",
+    "28;PUSH1;187", "30;PUSH1;0",
+    "0;PUSH1;9", "2;PUSH1;3", "4;SSTORE;", "5;STOP;",
+    "32;DELEGATECALL;1",
+    "33;ADDRESS;204", "34;STOP;",
+]
+CALL_STORAGE = {0xaa: {2: 5}, 0xcc: {1: 7, 3: 9}}
+
+
+class PoppingStack(mem.VariableStack):
+    """A VariableStack with DUP and SWAP done by popping and pushing."""
+
+    def dup(self, n: int) -> None:
+        items = self.pop_many(n)
+        self.push_many(reversed([items[-1]] + items))
+
+    def swap(self, n: int) -> None:
+        items = self.pop_many(n)
+        self.push_many(reversed([items[-1]] + items[1:-1] + [items[0]]))
+
+
+def stack_state(stack):
+    """The variables of stack, metavariables by name, and its empty pops."""
+    return ([(v.name, v.payload) if isinstance(v, mem.MetaVariable) else v
+             for v in stack], stack.empty_pops)
+
+
+def stack_pair(depth, max_size=mem.VariableStack.DEFAULT_MAX):
+    state = [mem.Variable(values=[i], name="V{}".format(i)) for i in range(depth)]
+    return (mem.VariableStack(state, max_size=max_size),
+            PoppingStack(state, max_size=max_size))
+
+
+@pytest.mark.parametrize("n", range(1, 17))
+@pytest.mark.parametrize("method", ["dup", "swap"])
+@pytest.mark.parametrize("depth", [0, 1, 8, 15, 16, 17, 20])
+def test_dup_swap_match_pop_push(method, n, depth):
+    # SWAPn reaches n + 1 deep, which is the width the Destackifier uses
+    width = opcodes.opcode_by_name("{}{}".format(method.upper(), n)).pop
+    stack, reference = stack_pair(depth)
+    for _ in range(3):
+        getattr(stack, method)(width)
+        getattr(reference, method)(width)
+        assert stack_state(stack) == stack_state(reference)
+
+
+def test_dup_on_full_stack():
+    stack, reference = stack_pair(20, max_size=20)
+    stack.dup(3)
+    reference.dup(3)
+    assert len(stack) == 20
+    assert stack_state(stack) == stack_state(reference)
+
+
+def test_dup_swap_sequence():
+    rand = random.Random(12)
+    stack, reference = stack_pair(6)
+    for _ in range(500):
+        if rand.randrange(4) == 0 and len(stack) > 0:
+            stack.pop()
+            reference.pop()
+        else:
+            method = rand.choice(["dup", "swap"])
+            n = rand.randrange(1, 17) + (method == "swap")
+            getattr(stack, method)(n)
+            getattr(reference, method)(n)
+        assert stack_state(stack) == stack_state(reference)
+
+
+def test_unwritten_memory_reads_zeros():
+    memory = mem.PagedMemory()
+    assert memory.read(PAGE - 3, 40) == bytes(40)
+    memory.write(10, bytes(PAGE * 2))
+    memory.write_int(PAGE * 5, 32, 0)
+    assert memory.read(0, PAGE * 6) == bytes(PAGE * 6)
+    assert memory.pages == {}
+    assert len(memory) == PAGE * 5 + 32
+
+
+@pytest.mark.parametrize("offset", [0, PAGE - 1, PAGE - 16, 3 * PAGE - 31])
+def test_words_across_pages(offset):
+    memory = mem.PagedMemory()
+    value = int.from_bytes(bytes(range(1, 33)), byteorder='big')
+    memory.write_int(offset, 32, value)
+    assert memory.read(offset, 32) == bytes(range(1, 33))
+    if offset > 0:
+        assert memory.read(offset - 1, 1) == bytes(1)
+    assert memory.read(offset + 32, 1) == bytes(1)
+    assert len(memory) == offset + 32
+
+
+def test_memory_matches_bytearray():
+    rand = random.Random(17)
+    memory = mem.PagedMemory()
+    expected = bytearray(5 * PAGE)
+    for _ in range(2000):
+        offset = max(0, rand.choice([0, PAGE, 2 * PAGE]) + rand.randrange(-40, 40))
+        length = rand.choice([1, 32, rand.randrange(0, 2 * PAGE)])
+        action = rand.randrange(3)
+        if action == 0:
+            data = bytes(rand.choice([0, rand.randrange(256)]) for _ in range(length))
+            memory.write(offset, data)
+            expected[offset: offset + length] = data
+        elif action == 1:
+            value = rand.choice([0, rand.getrandbits(8 * length)])
+            memory.write_int(offset, length, value)
+            expected[offset: offset + length] = value.to_bytes(length, byteorder='big')
+        else:
+            memory.clear(offset, length)
+            expected[offset: offset + length] = bytes(length)
+        start = max(0, offset - 8)
+        assert memory.read(start, length + 16) == bytes(expected[start: start + length + 16])
+    assert memory.read(0, len(expected)) == bytes(expected)
+
+
+def test_write_int_overflow():
+    memory = mem.PagedMemory()
+    with pytest.raises(OverflowError):
+        memory.write_int(PAGE - 1, 2, 1 << 16)
+    with pytest.raises(OverflowError):
+        memory.write_int(0, 1, 256)
+
+
+def test_clear_releases_pages():
+    memory = mem.PagedMemory()
+    memory.write(PAGE - 2, b"\xff" * (PAGE + 4))
+    assert sorted(memory.pages) == [0, 1, 2]
+    memory.clear(PAGE - 1, PAGE + 1)
+    assert sorted(memory.pages) == [0, 2]
+    assert memory.read(PAGE - 2, PAGE + 4) == b"\xff" + bytes(PAGE + 1) + b"\xff\xff"
+    memory.clear(0, 0)
+    assert memory.read(PAGE - 2, 1) == b"\xff"
+
+
+def test_mstore8_stores_low_byte():
+    efg = tac_efg.TACGraph.from_opcode(
+        ["0;PUSH2;4660", "3;PUSH1;64", "5;MSTORE8;", "6;PUSH2;513",
+         "9;PUSH1;96", "11;MSTORE;", "12;STOP;"])
+    assert efg.frames.memory.read(64, 1) == b"\x34"
+    assert efg.frames.memory.read(63, 3) == b"\x00\x34\x00"
+    assert efg.frames.memory.read(96, 32) == (513).to_bytes(32, byteorder='big')
+
+
+def test_frames_enter_and_resume():
+    storage = defaultdict(dict)
+    frames = mem.CallFrames()
+    frames.enter(storage, 0, 1)
+    frames.memory.write(0, b"outer")
+    frames.enter(storage, 1, 2)
+    assert len(frames) == 2 and frames.call_number == 1
+    assert frames.memory.read(0, 5) == bytes(5)
+    frames.memory.write(0, b"inner")
+
+    # A sibling call at the same depth replaces the frame that returned
+    frames.enter(storage, 2, 2)
+    assert len(frames) == 2 and frames.call_number == 2
+    assert frames.memory.read(0, 5) == bytes(5)
+
+    frames.resume(storage, 1)
+    assert len(frames) == 1 and frames.call_number == 0
+    assert frames.memory.read(0, 5) == b"outer"
+
+    # Resuming a frame that was never entered starts the missing ones
+    frames = mem.CallFrames()
+    frames.resume(storage, 3, 7)
+    assert len(frames) == 3 and frames.call_number == 7
+    assert frames.address is None
+
+
+def test_frames_store_by_address():
+    storage = defaultdict(dict)
+    frames = mem.CallFrames()
+    frames.enter(storage, 0, 1)
+    frames.store(storage, 1, 10)
+    assert storage == {}
+    frames.set_address(storage, 0xcc)
+    frames.store(storage, 2, 20)
+    assert storage == {0xcc: {1: 10, 2: 20}}
+
+    # A callee that never learns its address, and one that returns
+    # without a call being recorded, such as at the end of a trace
+    frames.enter(storage, 1, 2)
+    frames.store(storage, 3, 30)
+    frames.resume(storage, 1)
+    frames.call_returned(storage, 0xaa)
+    frames.enter(storage, 2, 2)
+    frames.store(storage, 4, 40)
+    frames.close(storage)
+    assert storage == {0xcc: {1: 10, 2: 20}, 0xaa: {3: 30}, None: {4: 40}}
+
+
+@pytest.mark.parametrize("cls", [tac_efg.TACGraph, tac_efg.TACStream])
+def test_storage_across_calls(cls):
+    efg = cls.from_opcode(CALL_TRACE)
+    list(efg.blocks)
+    assert efg.stack_values == CALL_STORAGE
+    assert len(efg.frames) == 1 and efg.frames.address == 0xcc
+
+
+def test_storage_without_address():
+    # Without the ADDRESS op, the outer frame and its delegate are unknown
+    efg = tac_efg.TACGraph.from_opcode(CALL_TRACE[:-2] + ["33;STOP;"])
+    assert efg.stack_values == {0xaa: {2: 5}, None: {1: 7, 3: 9}}
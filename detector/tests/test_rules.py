@@ -0,0 +1,76 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""test_rules.py: find the relations that rule files read."""
+
+import os
+
+import src.rules as rules
+
+RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "rules")
+DETECTOR_RULES = os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "rules")
+
+INPUTS = {"op_CALL", "op_SSTORE", "op_ORIGIN", "edge", "def", "use"}
+
+
+def test_included_inputs():
+    ruleset = rules.RuleSet([os.path.join(RULES, "calls.dl")])
+    assert ruleset.inputs == INPUTS
+    assert ruleset.opcodes() == ["CALL", "ORIGIN", "SSTORE"]
+
+
+def test_read_inputs():
+    # Relations in comments, literals and declarations are not read
+    ruleset = rules.RuleSet([os.path.join(RULES, "calls.dl")])
+    assert ruleset.read == {"op_CALL", "edge"}
+
+
+def test_read_inputs_of_several_files():
+    # input.dl is included by both, relative to each
+    ruleset = rules.RuleSet([os.path.join(RULES, "calls.dl"),
+                             os.path.join(RULES, "storage", "stores.dl")])
+    assert ruleset.inputs == INPUTS
+    assert ruleset.read == {"op_CALL", "op_SSTORE", "edge", "def"}
+    assert "op_ORIGIN" not in ruleset.read and "use" not in ruleset.read
+
+
+def test_inputs_only():
+    ruleset = rules.RuleSet([os.path.join(RULES, "input.dl")])
+    assert ruleset.inputs == INPUTS
+    assert ruleset.read == set()
+
+
+def test_detector_rules():
+    paths = [os.path.join(DETECTOR_RULES, name) for name in os.listdir(DETECTOR_RULES)
+             if name.endswith(".dl")]
+    ruleset = rules.RuleSet(paths)
+    assert ruleset.read <= ruleset.inputs
+    assert {"op_CALL", "op_SSTORE", "def", "use"} <= ruleset.read
+    # opcode.dl declares op_ADD, but no rule uses it
+    assert "op_ADD" in ruleset.inputs and "op_ADD" not in ruleset.read
+    assert "ADD" in ruleset.opcodes()
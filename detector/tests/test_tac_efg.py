@@ -0,0 +1,84 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""test_tac_efg.py: convert traces to TAC, with and without trusting their values."""
+
+import os
+
+import pytest
+
+import src.opcodes as opcodes
+import src.tac_efg as tac_efg
+
+EXAMPLE_TRACE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "example",
+    "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b.txt")
+
+# PUSHes and CALLER are recorded by geth, the first two ADDs are folded,
+# and MLOAD has no recorded value, so neither has the ADD that reads it
+MIXED_TRACE = ["0;PUSH1;1", "2;PUSH1;2", "4;ADD;", "5;CALLER;5", "6;ADD;",
+               "7;PUSH1;0", "9;MLOAD;", "10;ADD;", "11;STOP;"]
+MIXED_SOURCES = [(0, tac_efg.VALUE_FROM_TRACE, 1), (2, tac_efg.VALUE_FROM_TRACE, 2),
+                 (4, tac_efg.VALUE_FOLDED, 3), (5, tac_efg.VALUE_FROM_TRACE, 5),
+                 (6, tac_efg.VALUE_FOLDED, 8), (7, tac_efg.VALUE_FROM_TRACE, 0),
+                 (9, None, None), (10, None, None)]
+
+
+def value_sources(efg):
+    return [(op.pc, op.value_source, op.lhs.const_value) for op in efg.tac_ops
+            if isinstance(op, tac_efg.TACAssignOp)]
+
+
+@pytest.mark.parametrize("trust_values", [False, True])
+def test_mixed_value_sources(trust_values):
+    efg = tac_efg.TACGraph.from_opcode(MIXED_TRACE, trust_values)
+
+    assert value_sources(efg) == MIXED_SOURCES
+
+
+def test_value_sources_agree():
+    with open(EXAMPLE_TRACE) as f:
+        folded = value_sources(tac_efg.TACGraph.from_opcode(f))
+    with open(EXAMPLE_TRACE) as f:
+        trusted = value_sources(tac_efg.TACGraph.from_opcode(f, trust_values=True))
+
+    assert trusted == folded
+    sources = {source for _, source, _ in trusted}
+    assert {tac_efg.VALUE_FROM_TRACE, tac_efg.VALUE_FOLDED} <= sources
+    assert all((value is None) == (source is None) for _, source, value in trusted)
+
+
+def test_folded_ops_are_arithmetic():
+    with open(EXAMPLE_TRACE) as f:
+        efg = tac_efg.TACGraph.from_opcode(f, trust_values=True)
+
+    for op in efg.tac_ops:
+        if getattr(op, "value_source", None) == tac_efg.VALUE_FOLDED:
+            assert op.opcode.is_arithmetic()
+        elif getattr(op, "value_source", None) == tac_efg.VALUE_FROM_TRACE:
+            assert not op.opcode.is_arithmetic()
@@ -0,0 +1,105 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+
+"""test_tracedb.py: read traces from a mock of the geth MongoDB collection."""
+
+import os
+from unittest import mock
+
+import pytest
+
+import src.batch as batch
+import src.tracedb as tracedb
+
+EXAMPLE_HASH = "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b"
+EXAMPLE_TRACE = os.path.join(os.path.dirname(os.path.abspath(__file__)),
+                             "..", "..", "example", EXAMPLE_HASH + ".txt")
+OPCODES = ["CALL", "SSTORE", "SLOAD", "JUMPI", "TIMESTAMP"]
+
+
+def mock_collection(docs):
+    """Return a mock pymongo Collection whose find() yields docs."""
+    collection = mock.Mock()
+    collection.find.return_value.batch_size.return_value = iter(docs)
+    return collection
+
+
+def example_tx_trace() -> str:
+    """Return the example trace as the revised geth stores it in Tx_Trace."""
+    with open(EXAMPLE_TRACE) as f:
+        return tracedb.TRACE_SEP.join(l.strip() for l in f if len(l.strip()) > 0)
+
+
+def read_facts(facts_dir: str) -> dict:
+    facts = {}
+    for filename in os.listdir(facts_dir):
+        with open(os.path.join(facts_dir, filename)) as f:
+            facts[filename] = f.read()
+    return facts
+
+
+def test_split_trace():
+    assert list(tracedb.split_trace("0;PUSH1;96|2;PUSH1;64|4;MSTORE;")) == \
+        ["0;PUSH1;96", "2;PUSH1;64", "4;MSTORE;"]
+    assert list(tracedb.split_trace("")) == [""]
+
+
+def test_find_transactions():
+    collection = mock_collection([
+        {"_id": 1, tracedb.HASH_FIELD: "0xab", tracedb.TRACE_FIELD: "0;STOP;"},
+        {"_id": 2, tracedb.TRACE_FIELD: "0;STOP;"},
+        {"_id": 3, tracedb.HASH_FIELD: "0xcd"},
+    ])
+
+    transactions = list(tracedb.find_transactions(collection, batch_size=2))
+
+    assert transactions == [("0xab", "0;STOP;"), ("2", "0;STOP;"), ("0xcd", "")]
+    collection.find.assert_called_once_with(
+        {}, {tracedb.HASH_FIELD: True, tracedb.TRACE_FIELD: True})
+    collection.find.return_value.batch_size.assert_called_once_with(2)
+
+
+@pytest.mark.parametrize("jobs", [1, 2])
+def test_analyze_transactions(tmp_path, jobs):
+    collection = mock_collection([
+        {"_id": 1, tracedb.HASH_FIELD: EXAMPLE_HASH, tracedb.TRACE_FIELD: example_tx_trace()},
+        {"_id": 2, tracedb.HASH_FIELD: "0xbad", tracedb.TRACE_FIELD: "0;NOTANOP;"},
+    ])
+    trace_dir = str(tmp_path / "trace")
+    mongo_dir = str(tmp_path / "mongo")
+
+    batch.analyze_trace(EXAMPLE_TRACE, trace_dir, OPCODES, stream=True)
+    results = list(batch.analyze_transactions(
+        tracedb.find_transactions(collection), mongo_dir, OPCODES,
+        stream=True, jobs=jobs))
+
+    assert [(name, error is None) for name, _, error in results] == \
+        [(EXAMPLE_HASH, True), ("0xbad", False)]
+    assert os.listdir(mongo_dir) == [EXAMPLE_HASH]
+    assert read_facts(os.path.join(mongo_dir, EXAMPLE_HASH)) == read_facts(trace_dir)
@@ -0,0 +1,155 @@
+# BSD 3-Clause License
+#
+# Copyright (c) 2020, The Ohio State Univerisity. All rights reserved.
+#
+# Redistribution and use in source and binary forms, with or without
+# modification, are permitted provided that the following conditions are met:
+#
+# * Redistributions of source code must retain the above copyright notice, this
+#   list of conditions and the following disclaimer.
+#
+# * Redistributions in binary form must reproduce the above copyright notice,
+#   this list of conditions and the following disclaimer in the documentation
+#   and/or other materials provided with the distribution.
+#
+# * Neither the name of the copyright holder nor the names of its
+#   contributors may be used to endorse or promote products derived from
+#   this software without specific prior written permission.
+#
+# THIS SOFTWARE IS PROVIDED BY THE COPYRIGHT HOLDERS AND CONTRIBUTORS "AS IS"
+# AND ANY EXPRESS OR IMPLIED WARRANTIES, INCLUDING, BUT NOT LIMITED TO, THE
+# IMPLIED WARRANTIES OF MERCHANTABILITY AND FITNESS FOR A PARTICULAR PURPOSE ARE
+# DISCLAIMED. IN NO EVENT SHALL THE COPYRIGHT HOLDER OR CONTRIBUTORS BE LIABLE
+# FOR ANY DIRECT, INDIRECT, INCIDENTAL, SPECIAL, EXEMPLARY, OR CONSEQUENTIAL
+# DAMAGES (INCLUDING, BUT NOT LIMITED TO, PROCUREMENT OF SUBSTITUTE GOODS OR
+# SERVICES; LOSS OF USE, DATA, OR PROFITS; OR BUSINESS INTERRUPTION) HOWEVER
+# CAUSED AND ON ANY THEORY OF LIABILITY, WHETHER IN CONTRACT, STRICT LIABILITY,
+# OR TORT (INCLUDING NEGLIGENCE OR OTHERWISE) ARISING IN ANY WAY OUT OF THE USE
+# OF THIS SOFTWARE, EVEN IF ADVISED OF THE POSSIBILITY OF SUCH DAMAGE.
+"""test_tracefmt.py: the binary trace format and reading traces from files."""
+
+import io
+import os
+import threading
+
+import pytest
+
+import src.evm_efg as evm_efg
+import src.tracefmt as tracefmt
+
+EXAMPLE_TRACE = os.path.join(
+    os.path.dirname(os.path.abspath(__file__)), "..", "..", "example",
+    "0x37085f336b5d3e588e37674544678f8cb0fc092a6de5d83bd647e20e5232897b.txt")
+
+# Ops without values, with zero, one and two values, and 32-byte values
+TRACE = ["0;PUSH1;0", "2;PUSH32;{}".format(2 ** 256 - 1), "35;CALLER;{}".format(2 ** 255),
+         "36;ADD;", "37;JUMPDEST;", "38;CALL;1,0",
+         "39;SLOAD;{},{}".format(2 ** 256 - 2, 2 ** 248), "40;STOP;"]
+
+
+def fields(ops):
+    return [(op.pc, op.opcode, op.value, op.value_extra) for op in ops]
+
+
+def to_binary(ops):
+    f = io.BytesIO()
+    tracefmt.write_ops(ops, f)
+    return f.getvalue()
+
+
+@pytest.mark.parametrize("lines", [TRACE, [], "example"])
+def test_binary_round_trip(lines):
+    if lines == "example":
+        with open(EXAMPLE_TRACE) as f:
+            lines = f.readlines()
+    expected = fields(evm_efg.ops_from_trace(lines))
+    data = to_binary(evm_efg.ops_from_trace(lines))
+    assert data.startswith(tracefmt.MAGIC)
+    assert fields(tracefmt.ops_from_binary(data)) == expected
+    assert fields(evm_efg.ops_from_trace(
+        tracefmt.format_ops(tracefmt.ops_from_binary(data)))) == expected
+
+
+def test_binary_values():
+    ops = list(evm_efg.ops_from_trace(TRACE))
+    assert [op.value for op in ops[:3]] == [0, 2 ** 256 - 1, 2 ** 255]
+    assert (ops[3].value, ops[5].value_extra) == (None, 0)
+
+    # Values longer than 254 bytes take the long length
+    ops[0].value = 2 ** 2048 + 1
+    assert fields(tracefmt.ops_from_binary(to_binary(ops))) == fields(ops)
+
+
+def test_empty_binary_trace():
+    assert to_binary([]) == tracefmt.MAGIC
+    assert list(tracefmt.ops_from_binary(tracefmt.MAGIC)) == []
+
+
+@pytest.mark.parametrize("header", [b"", b"TXSPTR", b"TXSPTRC\x02", b"0;PUSH1;1\n"])
+def test_bad_magic_rejected(header):
+    data = to_binary(evm_efg.ops_from_trace(TRACE))
+    assert not tracefmt.is_binary(header + data[len(tracefmt.MAGIC):])
+    with pytest.raises(ValueError):
+        list(tracefmt.ops_from_binary(header + data[len(tracefmt.MAGIC):]))
+
+
+def test_unencodable_op_rejected():
+    ops = list(evm_efg.ops_from_trace(TRACE))
+    ops[1].value = -1
+    with pytest.raises(ValueError):
+        to_binary(ops)
+    ops[1].value = 1
+    ops[2].pc = 1 << 30
+    with pytest.raises(ValueError):
+        to_binary(ops)
+
+
+def read_file(path):
+    with open(path, "rb") as f:
+        return fields(tracefmt.read_ops(f))
+
+
+def read_memory(path):
+    with open(path, "rb") as f:
+        return fields(tracefmt.read_ops(io.BytesIO(f.read())))
+
+
+def read_pipe(path):
+    with open(path, "rb") as f:
+        data = f.read()
+    r, w = os.pipe()
+
+    def feed():
+        with open(w, "wb") as out:
+            out.write(data)
+
+    writer = threading.Thread(target=feed)
+    writer.start()
+    try:
+        with open(r, "rb") as f:
+            return fields(tracefmt.read_ops(f))
+    finally:
+        writer.join()
+
+
+@pytest.fixture(params=["text", "binary", "empty", "empty binary"])
+def trace_file(request, tmp_path):
+    """A trace file, with the fields of the ops it holds."""
+    with open(EXAMPLE_TRACE, "rb") as f:
+        lines = f.readlines()
+    path = str(tmp_path / "trace")
+    with open(path, "wb") as f:
+        if request.param == "text":
+            f.writelines(lines)
+        elif request.param == "binary":
+            tracefmt.write_ops(evm_efg.ops_from_trace(lines), f)
+        elif request.param == "empty binary":
+            f.write(tracefmt.MAGIC)
+    expected = fields(evm_efg.ops_from_trace(lines)) if "empty" not in request.param else []
+    return path, expected
+
+
+@pytest.mark.parametrize("read", [read_file, read_memory, read_pipe])
+def test_read_ops(read, trace_file):
+    path, expected = trace_file
+    assert read(path) == expected